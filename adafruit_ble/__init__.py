@@ -18,15 +18,79 @@ if sys.implementation.name == "circuitpython" and sys.implementation.version[0]
     )
 # pylint: enable=wrong-import-position
 
+import time
+
 import _bleio
 
 from .services import Service
-from .advertising import Advertisement
+from .advertising import Advertisement, matches_prefix_bytes
+from .advertising.scan import compile_scan_plan
+from .advertising.split import split_advertisement
 
 __version__ = "0.0.0-auto.0"
 __repo__ = "https://github.com/adafruit/Adafruit_CircuitPython_BLE.git"
 
 
+class _MergedScanEntry:
+    """A scanned advertisement combined with the scan response from the same address. It has
+    the attributes and `matches` method of `_bleio.ScanEntry`."""
+
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = ("address", "advertisement_bytes", "rssi", "connectable")
+
+    scan_response = False
+
+    def __init__(self, advertisement, scan_response):
+        self.address = advertisement.address
+        self.advertisement_bytes = (
+            advertisement.advertisement_bytes + scan_response.advertisement_bytes
+        )
+        self.rssi = advertisement.rssi
+        self.connectable = advertisement.connectable
+
+    def matches(self, prefixes, *, all=True):  # pylint: disable=redefined-builtin
+        """Returns ``True`` if the combined data matches all of ``prefixes``, or any of them if
+        ``all`` is ``False``."""
+        return matches_prefix_bytes(self.advertisement_bytes, prefixes, match_all=all)
+
+
+def _merge_scan_responses(entries, wait, max_pending):
+    """Combines each advertisement from ``entries`` with the scan response that follows it from
+    the same address. Advertisements are held for up to ``wait`` seconds. Held advertisements
+    are passed on alone when their wait runs out, which is checked as entries arrive, when more
+    than ``max_pending`` are held, and when the scan ends. Scan responses without a held
+    advertisement are passed on alone."""
+    # Maps addresses to their held entry and release time. Kept small, so it is searched
+    # linearly for the oldest entry.
+    pending = {}
+    for entry in entries:
+        now = time.monotonic()
+        for address in [
+            address for address, (_, deadline) in pending.items() if deadline <= now
+        ]:
+            yield pending.pop(address)[0]
+        address = entry.address
+        if entry.scan_response:
+            held = pending.pop(address, None)
+            if held is None:
+                yield entry
+            else:
+                yield _MergedScanEntry(held[0], entry)
+            continue
+        held = pending.pop(address, None)
+        if held is not None:
+            # No scan response came before the next advertisement.
+            yield held[0]
+        if len(pending) >= max_pending:
+            oldest = min(pending, key=lambda address: pending[address][1])
+            yield pending.pop(oldest)[0]
+        pending[address] = (entry, now + wait)
+    while pending:
+        oldest = min(pending, key=lambda address: pending[address][1])
+        yield pending.pop(oldest)[0]
+
+
 class BLEConnection:
     """
     Represents a connection to a peer BLE device.
@@ -146,31 +210,54 @@ class BLERadio:
             raise RuntimeError("No adapter available")
         self._adapter = adapter or _bleio.adapter
         self._current_advertisement = None
+        # Encoded payload, connectable, scan response, interval and timeout of the current
+        # advertisement. Used by update_advertisement().
+        self._advertising_state = None
         self._connection_cache = {}
+        # (name, tx_power, encoded bytes) of the last default scan response.
+        self._default_scan_response = None
+        # Reused for every start_advertising() call. The adapter copies the data it is given.
+        self._advertising_buffer = bytearray(Advertisement.MAX_LEGACY_DATA_SIZE)
+        self._scan_response_buffer = bytearray(Advertisement.MAX_LEGACY_DATA_SIZE)
+        # Allocated on first use of extended advertising.
+        self._extended_advertising_buffer = None
+        # Created by the first on_advertisement() call.
+        self._dispatcher = None
 
     def start_advertising(
-        self, advertisement, scan_response=None, interval=0.1, timeout=None
+        self,
+        advertisement,
+        scan_response=None,
+        interval=0.1,
+        timeout=None,
+        *,
+        extended=False
     ):
         """
         Starts advertising the given advertisement.
 
         :param buf scan_response: scan response data packet bytes.
             If ``None``, a default scan response will be generated that includes
-            `BLERadio.name` and `BLERadio.tx_power`.
+            `BLERadio.name` and `BLERadio.tx_power`. If ``None`` and the advertisement is longer
+            than 31 bytes, its fields are split between the advertisement and the scan response
+            with `split_advertisement`. `ValueError` is raised if they don't all fit.
         :param float interval:  advertising interval, in seconds
         :param int timeout:  advertising timeout in seconds.
             If None, no timeout.
+        :param bool extended: When True, use extended advertising so the advertisement can be up
+            to `Advertisement.MAX_EXTENDED_DATA_SIZE` bytes long. No default scan response is
+            generated and the advertisement is never split.
 
         ``timeout`` is not available in CircuitPython 5.x and must be `None`.
         """
-        advertisement_bytes = bytes(advertisement)
-        scan_response_bytes = b""
-        if not scan_response and len(advertisement_bytes) <= 31:
-            scan_response = Advertisement()
-            scan_response.complete_name = self.name
-            scan_response.tx_power = self.tx_power
-        if scan_response:
-            scan_response_bytes = bytes(scan_response)
+        if extended:
+            advertisement_bytes, scan_response_bytes = self._encode_extended_data(
+                advertisement, scan_response
+            )
+        else:
+            advertisement_bytes, scan_response_bytes = self._encode_advertising_data(
+                advertisement, scan_response
+            )
 
         # pylint: disable=unexpected-keyword-arg
         # Remove after 5.x is no longer supported.
@@ -194,10 +281,131 @@ class BLERadio:
                 interval=interval,
                 timeout=0 if timeout is None else timeout,
             )
+        self._current_advertisement = advertisement
+        self._advertising_state = (
+            bytes(advertisement),
+            advertisement.connectable,
+            scan_response,
+            interval,
+            timeout,
+            extended,
+        )
+
+    def update_advertisement(self, advertisement):
+        """
+        Changes the data being advertised to ``advertisement``, keeping the scan response,
+        interval and timeout given to `start_advertising`. Nothing is sent to the adapter if the
+        encoded advertisement is unchanged, so this can be called every time a broadcast value
+        might have changed.
+
+        :return: ``True`` if the adapter was updated, ``False`` if the payload was unchanged.
+        :rtype: bool
+        """
+        if self._advertising_state is None:
+            raise RuntimeError("Not advertising")
+        (
+            advertised_bytes,
+            connectable,
+            scan_response,
+            interval,
+            timeout,
+            extended,
+        ) = self._advertising_state
+        if isinstance(advertisement, Advertisement):
+            # Encode afresh. The cached encoding doesn't see values of data_dict that were
+            # changed in place.
+            advertisement.invalidate()
+        if (
+            advertisement.connectable == connectable
+            and bytes(advertisement) == advertised_bytes
+        ):
+            return False
+        # _bleio has no way to replace the data of a running advertisement, so restart it
+        # right away with the same parameters.
+        if self.advertising:
+            self._adapter.stop_advertising()
+        self.start_advertising(
+            advertisement,
+            scan_response=scan_response,
+            interval=interval,
+            timeout=timeout,
+            extended=extended,
+        )
+        return True
+
+    def _encode_advertising_data(self, advertisement, scan_response):
+        """Returns the encoded advertisement and scan response to hand to the adapter."""
+        if (
+            scan_response is None
+            and len(advertisement) > Advertisement.MAX_LEGACY_DATA_SIZE
+        ):
+            primary, split_scan_response, dropped = split_advertisement(advertisement)
+            if dropped:
+                raise ValueError(
+                    "Advertisement too long. Data types that don't fit: {}".format(
+                        ", ".join("0x{:02x}".format(adt) for adt in dropped)
+                    )
+                )
+            advertisement, scan_response = primary, split_scan_response
+        advertisement_bytes = self._pack(advertisement, self._advertising_buffer)
+        scan_response_bytes = b""
+        if (
+            not scan_response
+            and len(advertisement_bytes) <= Advertisement.MAX_LEGACY_DATA_SIZE
+        ):
+            scan_response_bytes = self._default_scan_response_bytes()
+        elif scan_response:
+            scan_response_bytes = self._pack(scan_response, self._scan_response_buffer)
+        return advertisement_bytes, scan_response_bytes
+
+    def _encode_extended_data(self, advertisement, scan_response):
+        """Returns the encoded extended advertisement and scan response to hand to the
+        adapter."""
+        if len(advertisement) > Advertisement.MAX_EXTENDED_DATA_SIZE:
+            raise ValueError(
+                "Advertisement longer than {} bytes".format(
+                    Advertisement.MAX_EXTENDED_DATA_SIZE
+                )
+            )
+        if self._extended_advertising_buffer is None:
+            self._extended_advertising_buffer = bytearray(
+                Advertisement.MAX_EXTENDED_DATA_SIZE
+            )
+        advertisement_bytes = self._pack(
+            advertisement, self._extended_advertising_buffer
+        )
+        scan_response_bytes = b""
+        if scan_response:
+            scan_response_bytes = bytes(scan_response)
+        return advertisement_bytes, scan_response_bytes
+
+    @staticmethod
+    def _pack(advertisement, buffer):
+        """Encodes the advertisement into the reusable buffer if it fits and returns a view of the
+        encoded bytes. Larger advertisements, and raw bytes, are returned as bytes objects."""
+        if not hasattr(advertisement, "pack_into") or len(advertisement) > len(buffer):
+            return bytes(advertisement)
+        return memoryview(buffer)[: advertisement.pack_into(buffer)]
+
+    def _default_scan_response_bytes(self):
+        """Encoded default scan response with `name` and `tx_power`. Rebuilt only when either
+        of them changes."""
+        name = self.name
+        tx_power = self.tx_power
+        cached = self._default_scan_response
+        if cached is None or cached[0] != name or cached[1] != tx_power:
+            scan_response = Advertisement()
+            scan_response.complete_name = name
+            scan_response.tx_power = tx_power
+            cached = (name, tx_power, bytes(scan_response))
+            self._default_scan_response = cached
+        return cached[2]
 
     def stop_advertising(self):
         """Stops advertising."""
         self._adapter.stop_advertising()
+        self._current_advertisement = None
+        self._advertising_state = None
 
     def start_scan(
         self,
@@ -208,7 +416,13 @@ class BLERadio:
         interval=0.1,
         window=0.1,
         minimum_rssi=-80,
-        active=True
+        active=True,
+        merge_scan_responses=False,
+        scan_response_wait=0.1,
+        max_pending=16,
+        batch_size=None,
+        batch_interval=None,
+        scan_filter=None
     ):
         """
         Starts scanning. Returns an iterator of advertisement objects of the types given in
@@ -219,7 +433,16 @@ class BLERadio:
         by the returned iterator. If none are given then `Advertisement` objects will be
         returned.
 
-        Advertisements and scan responses are filtered and returned separately.
+        Advertisements and scan responses are filtered and returned separately, unless
+        ``merge_scan_responses`` is set. Then each advertisement is held until the scan response
+        from the same address arrives, and a single advertisement holding the data of both is
+        returned. The merged advertisement is matched against ``advertisement_types`` as a
+        whole, so a type can match on data from either packet. Because of that, entries are
+        not filtered by prefix in the adapter in this mode.
+
+        If ``batch_size`` or ``batch_interval`` is given, lists of advertisements are returned
+        instead of single advertisements, to spread per item costs of the consumer over many
+        advertisements.
 
         :param int buffer_size: the maximum number of advertising bytes to buffer.
         :param bool extended: When True, support extended advertising packets.
@@ -233,22 +456,33 @@ class BLERadio:
             window must be <= interval.
         :param int minimum_rssi: the minimum rssi of entries to return.
         :param bool active: request and retrieve scan responses for scannable advertisements.
+        :param bool merge_scan_responses: combine advertisements with their scan responses.
+            Only has an effect when ``active`` is set.
+        :param float scan_response_wait: the longest time (in seconds) an advertisement is held
+            waiting for its scan response before it is returned alone. Held advertisements are
+            checked when the next entry arrives, so they may be held longer when the air is
+            quiet.
+        :param int max_pending: the maximum number of advertisements held at once. The oldest
+            is returned alone when another needs to be held.
+        :param int batch_size: the maximum number of advertisements in a list.
+        :param float batch_interval: the longest time (in seconds) from the first advertisement
+            in a list until the list is returned. It is checked as entries arrive, so a list may
+            be held longer when the air is quiet. A partial list is returned when the scan ends.
+        :param ScanFilter scan_filter: criteria checked on each raw entry before an
+            advertisement is made from it, such as addresses, company ids and services.
         :return: If any ``advertisement_types`` are given,
             only Advertisements of those types are produced by the returned iterator.
             If none are given then `Advertisement` objects will be returned.
         :rtype: iterable
         """
-        if not advertisement_types:
-            advertisement_types = (Advertisement,)
-
-        all_prefix_bytes = tuple(adv.get_prefix_bytes() for adv in advertisement_types)
-
-        # If one of the advertisement_types has no prefix restrictions, then
-        # no prefixes should be specified at all, so we match everything.
-        prefixes = b"" if b"" in all_prefix_bytes else b"".join(all_prefix_bytes)
-
-        for entry in self._adapter.start_scan(
-            prefixes=prefixes,
+        # pylint: disable=too-many-locals
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        plan = compile_scan_plan(advertisement_types)
+        merge_scan_responses = merge_scan_responses and active
+
+        entries = self._adapter.start_scan(
+            prefixes=b"" if merge_scan_responses else plan.prefixes,
             buffer_size=buffer_size,
             extended=extended,
             timeout=timeout,
@@ -256,18 +490,106 @@ class BLERadio:
             window=window,
             minimum_rssi=minimum_rssi,
             active=active,
-        ):
-            adv_type = Advertisement
-            for possible_type in advertisement_types:
-                if possible_type.matches(entry) and issubclass(possible_type, adv_type):
-                    adv_type = possible_type
-            # Double check the adv_type is requested. We may return Advertisement accidentally
-            # otherwise.
-            if adv_type not in advertisement_types:
-                continue
-            advertisement = adv_type(entry=entry)
-            if advertisement:
-                yield advertisement
+        )
+        if merge_scan_responses:
+            entries = _merge_scan_responses(entries, scan_response_wait, max_pending)
+        if batch_size is None and batch_interval is None:
+            for entry in entries:
+                advertisement = plan.advertisement(entry, scan_filter)
+                if advertisement is not None:
+                    yield advertisement
+            return
+
+        batch = []
+        batch_deadline = None
+        for entry in entries:
+            advertisement = plan.advertisement(entry, scan_filter)
+            if advertisement is not None:
+                if not batch and batch_interval is not None:
+                    batch_deadline = time.monotonic() + batch_interval
+                batch.append(advertisement)
+            if batch and (
+                (batch_size is not None and len(batch) >= batch_size)
+                or (batch_deadline is not None and time.monotonic() >= batch_deadline)
+            ):
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def scan_async(self, *advertisement_types, queue_size=32, timeout=None, **kwargs):
+        """
+        Starts scanning for use with asyncio. Returns an async generator of the advertisements
+        `start_scan` produces. The scan is read on a background thread into a queue of at most
+        ``queue_size`` advertisements, so the event loop is never blocked.
+
+        The scan stops, with `stop_scan`, when the generator is closed or garbage collected, such
+        as after ``break`` out of an ``async for`` loop, when the task iterating it is cancelled
+        or when ``timeout`` is reached. Not available on CircuitPython.
+
+        :param int queue_size: the maximum number of advertisements waiting to be iterated.
+        :param float timeout: the scan timeout in seconds.
+            If None, will scan until the generator is closed.
+        :param kwargs: other keyword arguments are passed to `start_scan`.
+        """
+        # asyncio and threading aren't available on CircuitPython.
+        from .aio import scan_advertisements  # pylint: disable=import-outside-toplevel
+
+        return scan_advertisements(
+            self,
+            advertisement_types,
+            queue_size=queue_size,
+            timeout=timeout,
+            scan_kwargs=kwargs,
+        )
+
+    def on_advertisement(self, advertisement_type, handler, *, queue_size=64):
+        """
+        Registers ``handler`` to be called by `dispatch_scan` with every scanned advertisement
+        that is an instance of ``advertisement_type``. Returns ``handler``. Not available on
+        CircuitPython.
+
+        :param type advertisement_type: an `Advertisement` class
+        :param handler: function called with each advertisement
+        :param int queue_size: the maximum number of advertisements waiting for the handler.
+            The oldest are dropped when the handler falls behind.
+        """
+        if self._dispatcher is None:
+            # threading isn't available on CircuitPython.
+            # pylint: disable=import-outside-toplevel
+            from .dispatch import ScanDispatcher
+
+            self._dispatcher = ScanDispatcher(self)
+        self._dispatcher.add(advertisement_type, handler, queue_size=queue_size)
+        return handler
+
+    def remove_advertisement_handler(self, advertisement_type, handler):
+        """Removes a handler registered with `on_advertisement`."""
+        if self._dispatcher is None:
+            raise ValueError("Handler not registered")
+        self._dispatcher.remove(advertisement_type, handler)
+
+    def dispatch_scan(self, *, workers=4, on_error=None, **kwargs):
+        """
+        Scans for the types registered with `on_advertisement` and passes each advertisement
+        to the matching handlers. Matching and decoding run on the calling thread and handlers
+        run on a pool of ``workers`` threads, so a slow handler doesn't hold up the scan or
+        other handlers. Returns once the scan ends, through its timeout or `stop_scan`, and
+        the handlers have caught up.
+
+        :param int workers: the number of threads that run handlers.
+        :param on_error: function called with the handler, the advertisement and the exception
+            when a handler raises. By default the traceback is printed.
+        :param kwargs: other keyword arguments are passed to `start_scan`.
+        :return: the number of advertisements dropped for each registration, keyed by
+            (advertisement type, handler).
+        :rtype: dict
+        """
+        if self._dispatcher is None:
+            raise RuntimeError("No advertisement handlers")
+        return self._dispatcher.run(
+            workers=workers, on_error=on_error, scan_kwargs=kwargs
+        )
 
     def stop_scan(self):
         """Stops any active scan.
@@ -7,6 +7,58 @@ Advertising is the first phase of BLE where devices can broadcast
 """
 
 import struct
+from array import array
+from collections import OrderedDict
+
+
+class _StructCodec:
+    """Stand-in for `struct.Struct` on implementations that don't provide it."""
+
+    def __init__(self, struct_format):
+        self.format = struct_format
+        self.size = struct.calcsize(struct_format)
+
+    def pack(self, *values):
+        """Packs the values according to the format."""
+        return struct.pack(self.format, *values)
+
+    def pack_into(self, buffer, offset, *values):
+        """Packs the values into the buffer at the given offset."""
+        struct.pack_into(self.format, buffer, offset, *values)
+
+    def unpack(self, buffer):
+        """Unpacks the buffer, which must be exactly `size` bytes long."""
+        return struct.unpack(self.format, buffer)
+
+    def unpack_from(self, buffer, offset=0):
+        """Unpacks from the buffer starting at the given offset."""
+        return struct.unpack_from(self.format, buffer, offset)
+
+    def iter_unpack(self, buffer):
+        """Iteratively unpacks a buffer that holds a whole number of entries."""
+        for offset in range(0, len(buffer), self.size):
+            yield struct.unpack_from(self.format, buffer, offset)
+
+
+_struct_codecs = {}
+
+
+def compile_struct(struct_format):
+    """Returns a precompiled codec for ``struct_format`` with the `struct.Struct` interface.
+    Codecs are shared between all users of the same format."""
+    codec = _struct_codecs.get(struct_format, None)
+    if codec is None:
+        if hasattr(struct, "Struct"):
+            codec = struct.Struct(struct_format)
+        else:
+            codec = _StructCodec(struct_format)
+        _struct_codecs[struct_format] = codec
+    return codec
+
+
+ZERO_COPY_MIN_SIZE = 32
+"""Smallest value, in bytes, that `decode_data` returns as a `memoryview` when ``zero_copy`` is
+set."""
 
 
 def to_hex(seq):
@@ -19,19 +71,35 @@ def to_bytes_literal(seq):
     return 'b"' + "".join("\\x{:02x}".format(v) for v in seq) + '"'
 
 
-def decode_data(data, *, key_encoding="B"):
+def decode_data(data, *, key_encoding="B", zero_copy=False):
     """Helper which decodes length encoded structures into a dictionary with the given key
-    encoding."""
+    encoding.
+
+    When ``zero_copy`` is ``True``, values of at least `ZERO_COPY_MIN_SIZE` bytes are
+    `memoryview` slices of ``data`` instead of copies. Smaller values are still copied: a slice
+    of them would be larger than the copy and would keep all of ``data`` alive."""
     i = 0
     data_dict = {}
-    key_size = struct.calcsize(key_encoding)
+    # Single byte keys, used by all advertising data types, are read without the codec.
+    key_codec = None if key_encoding == "B" else compile_struct(key_encoding)
+    key_size = 1 if key_codec is None else key_codec.size
+    view = None
     while i < len(data):
         item_length = data[i]
         i += 1
         if item_length == 0:
             break
-        key = struct.unpack_from(key_encoding, data, i)[0]
-        value = data[i + key_size : i + item_length]
+        key = data[i] if key_codec is None else key_codec.unpack_from(data, i)[0]
+        start = i + key_size
+        end = i + item_length
+        if not zero_copy:
+            value = data[start:end]
+        elif end - start >= ZERO_COPY_MIN_SIZE:
+            if view is None:
+                view = data if isinstance(data, memoryview) else memoryview(data)
+            value = view[start:end]
+        else:
+            value = bytes(data[start:end])
         if key in data_dict:
             if not isinstance(data_dict[key], list):
                 data_dict[key] = [data_dict[key]]
@@ -42,6 +110,91 @@ def decode_data(data, *, key_encoding="B"):
     return data_dict
 
 
+class AdvertisingDataIndex:
+    """Compact index of the length encoded structures in ``data``, decoded with the given key
+    encoding. Each structure is stored as a (key, value offset, value length) triple in the
+    ``entries`` `array.array`, so repeated keys need no lists. Used to find the offsets of
+    fields when compiling templates."""
+
+    def __init__(self, data, *, key_encoding="B"):
+        if not isinstance(data, memoryview):
+            data = memoryview(data)
+        self.data = data
+        self.entries = array("H")
+        # Position in entries of the first structure with each key.
+        self._first = {}
+        key_codec = compile_struct(key_encoding)
+        key_size = key_codec.size
+        i = 0
+        position = 0
+        while i < len(data):
+            item_length = data[i]
+            if item_length == 0:
+                break
+            key = key_codec.unpack_from(data, i + 1)[0]
+            if key not in self._first:
+                self._first[key] = position
+            offset = i + 1 + key_size
+            self.entries.append(key)
+            self.entries.append(offset)
+            self.entries.append(max(0, min(item_length - key_size, len(data) - offset)))
+            position += 3
+            i += 1 + item_length
+
+    def __len__(self):
+        return len(self.entries) // 3
+
+    def spans(self, key):
+        """Iterates over the (offset, length) of the values of all structures with the given
+        key, in order."""
+        position = self._first.get(key, None)
+        if position is None:
+            return
+        entries = self.entries
+        for i in range(position, len(entries), 3):
+            if entries[i] == key:
+                yield entries[i + 1], entries[i + 2]
+
+
+def starts_with(value, prefix):
+    """Returns ``True`` if the byte sequence ``value`` starts with ``prefix``. Unlike
+    ``bytes.startswith`` this also works for `memoryview` values."""
+    return len(value) >= len(prefix) and bytes(value[: len(prefix)]) == prefix
+
+
+def matches_prefix_bytes(data, prefix_bytes, *, match_all=True):
+    """Pure Python equivalent of `_bleio.ScanEntry.matches` for raw advertisement ``data``.
+    Returns ``True`` if the data structures of ``data``, starting with their data type, start
+    with all of the prefixes in ``prefix_bytes``, or any of them if ``match_all`` is ``False``.
+
+    :param bytes prefix_bytes: length prefixed byte strings, as made by
+        `Advertisement.get_prefix_bytes`
+    """
+    prefixes = set()
+    i = 0
+    while i < len(prefix_bytes):
+        prefix_length = prefix_bytes[i]
+        prefixes.add(bytes(prefix_bytes[i + 1 : i + 1 + prefix_length]))
+        i += 1 + prefix_length
+    if not prefixes:
+        return True
+    i = 0
+    while i < len(data):
+        item_length = data[i]
+        if item_length == 0:
+            break
+        structure = bytes(data[i + 1 : i + 1 + item_length])
+        for prefix in tuple(prefixes):
+            if structure.startswith(prefix):
+                if not match_all:
+                    return True
+                prefixes.discard(prefix)
+        if not prefixes:
+            return True
+        i += 1 + item_length
+    return False
+
+
 def compute_length(data_dict, *, key_encoding="B"):
     """Computes the length of the encoded data dictionary."""
     value_size = 0
@@ -51,32 +204,50 @@ def compute_length(data_dict, *, key_encoding="B"):
                 value_size += len(subv)
         else:
             value_size += len(value)
-    return len(data_dict) + len(data_dict) * struct.calcsize(key_encoding) + value_size
+    return (
+        len(data_dict) + len(data_dict) * compile_struct(key_encoding).size + value_size
+    )
 
 
-def encode_data(data_dict, *, key_encoding="B"):
+def encode_data_into(data_dict, buffer, offset=0, *, key_encoding="B"):
     """Helper which encodes dictionaries into length encoded structures with the given key
-    encoding."""
+    encoding, writing them into ``buffer`` starting at ``offset``. Returns the number of bytes
+    written. Values that provide ``pack_into`` write themselves straight into ``buffer``."""
     length = compute_length(data_dict, key_encoding=key_encoding)
-    data = bytearray(length)
-    key_size = struct.calcsize(key_encoding)
-    i = 0
+    if offset + length > len(buffer):
+        raise ValueError("Buffer too small")
+    key_codec = compile_struct(key_encoding)
+    key_size = key_codec.size
+    i = offset
     for key, value in data_dict.items():
         if isinstance(value, list):
             value = b"".join(value)
         item_length = key_size + len(value)
-        struct.pack_into("B", data, i, item_length)
-        struct.pack_into(key_encoding, data, i + 1, key)
-        data[i + 1 + key_size : i + 1 + item_length] = bytes(value)
+        buffer[i] = item_length
+        key_codec.pack_into(buffer, i + 1, key)
+        if hasattr(value, "pack_into"):
+            value.pack_into(buffer, i + 1 + key_size)
+        else:
+            if not isinstance(value, (bytes, bytearray, memoryview)):
+                value = bytes(value)
+            buffer[i + 1 + key_size : i + 1 + item_length] = value
         i += 1 + item_length
+    return length
+
+
+def encode_data(data_dict, *, key_encoding="B"):
+    """Helper which encodes dictionaries into length encoded structures with the given key
+    encoding."""
+    data = bytearray(compute_length(data_dict, key_encoding=key_encoding))
+    encode_data_into(data_dict, data, key_encoding=key_encoding)
     return bytes(data)
 
 
 class AdvertisingDataField:
     """Top level class for any descriptor classes that live in Advertisement or its subclasses."""
 
-    # pylint: disable=too-few-public-methods,unnecessary-pass
-    pass
+    # pylint: disable=too-few-public-methods
+    __slots__ = ()
 
 
 class AdvertisingFlag:
@@ -97,6 +268,13 @@ class AdvertisingFlag:
             obj.flags &= ~self._bitmask
 
 
+# Per-class caches for AdvertisingFlags.flag_names(), Advertisement.data_fields() and
+# Advertisement.get_prefix_bytes().
+_flag_registries = {}
+_field_registries = {}
+_prefix_bytes_cache = {}
+
+
 class AdvertisingFlags(AdvertisingDataField):
     """Standard advertising flags"""
 
@@ -108,12 +286,25 @@ class AdvertisingFlags(AdvertisingDataField):
     """BR/EDR not supported."""
     # BR/EDR flags not included here, since we don't support BR/EDR.
 
+    __slots__ = ("_advertisement", "_adt", "_flags")
+
     def __init__(self, advertisement, advertising_data_type):
         self._advertisement = advertisement
         self._adt = advertising_data_type
-        self.flags = 0
-        if self._adt in self._advertisement.data_dict:
-            self.flags = self._advertisement.data_dict[self._adt][0]
+        self._flags = 0
+        value = self._advertisement.first_value(self._adt)
+        if value:
+            self._flags = value[0]
+
+    @property
+    def flags(self):
+        """The flags as a single integer bitmask."""
+        return self._flags
+
+    @flags.setter
+    def flags(self, value):
+        self._flags = value
+        self._advertisement.invalidate()
 
     def __len__(self):
         return 1
@@ -121,13 +312,32 @@ class AdvertisingFlags(AdvertisingDataField):
     def __bytes__(self):
         return bytes([self.flags])
 
+    def pack_into(self, buffer, offset=0):
+        """Packs the flags into the buffer at the given offset. Returns the number of bytes
+        written."""
+        buffer[offset] = self._flags
+        return 1
+
+    @classmethod
+    def flag_names(cls):
+        """Names of the `AdvertisingFlag` attributes of the class, in sorted order. Collected
+        once per class."""
+        names = _flag_registries.get(cls, None)
+        if names is None:
+            names = tuple(
+                attr
+                for attr in dir(cls)
+                if isinstance(getattr(cls, attr), AdvertisingFlag)
+            )
+            _flag_registries[cls] = names
+        return names
+
+    def to_dict(self):
+        """Returns a dictionary of each flag name to its value."""
+        return {attr: getattr(self, attr) for attr in self.flag_names()}
+
     def __str__(self):
-        parts = []
-        for attr in dir(self.__class__):
-            attribute_instance = getattr(self.__class__, attr)
-            if issubclass(attribute_instance.__class__, AdvertisingFlag):
-                if getattr(self, attr):
-                    parts.append(attr)
+        parts = [attr for attr in self.flag_names() if getattr(self, attr)]
         return "<AdvertisingFlags {} >".format(" ".join(parts))
 
 
@@ -142,12 +352,19 @@ class String(AdvertisingDataField):
     def __get__(self, obj, cls):
         if obj is None:
             return self
-        if self._adt not in obj.data_dict:
+        value = obj.first_value(self._adt)
+        if value is None:
             return None
-        return str(obj.data_dict[self._adt], "utf-8")
+        return str(value, "utf-8")
 
     def __set__(self, obj, value):
         obj.data_dict[self._adt] = value.encode("utf-8")
+        obj.invalidate()
+
+    @property
+    def advertising_data_type(self):
+        """Return the data type value used to indicate this field."""
+        return self._adt
 
 
 class Struct(AdvertisingDataField):
@@ -155,17 +372,35 @@ class Struct(AdvertisingDataField):
 
     def __init__(self, struct_format, *, advertising_data_type):
         self._format = struct_format
+        self._struct = compile_struct(struct_format)
         self._adt = advertising_data_type
 
     def __get__(self, obj, cls):
         if obj is None:
             return self
-        if self._adt not in obj.data_dict:
+        value = obj.first_value(self._adt)
+        if value is None:
             return None
-        return struct.unpack(self._format, obj.data_dict[self._adt])[0]
+        return self._struct.unpack(value)[0]
 
     def __set__(self, obj, value):
-        obj.data_dict[self._adt] = struct.pack(self._format, value)
+        obj.data_dict[self._adt] = self._struct.pack(value)
+        obj.invalidate()
+
+    @property
+    def advertising_data_type(self):
+        """Return the data type value used to indicate this field."""
+        return self._adt
+
+    def template_field(self, advertisement, index):
+        """Returns the `TemplateField` for this field in the indexed encoding of
+        ``advertisement``, or ``None`` if it isn't present."""
+        # pylint: disable=unused-argument
+        for offset, length in index.spans(self._adt):
+            if length == self._struct.size:
+                return TemplateField(self._struct, offset)
+            break
+        return None
 
 
 class LazyObjectField(AdvertisingDataField):
@@ -181,12 +416,15 @@ class LazyObjectField(AdvertisingDataField):
         if obj is None:
             return self
         # Return None if our object is immutable and the data is not present.
-        if not obj.mutable and self._adt not in obj.data_dict:
+        if not obj.mutable and obj.first_value(self._adt) is None:
             return None
         # Instantiate the object.
         bound_obj = self._cls(obj, advertising_data_type=self._adt, **self._kwargs)
         setattr(obj, self._attribute_name, bound_obj)
-        obj.data_dict[self._adt] = bound_obj
+        if obj.mutable:
+            # Encode from the bound object from now on.
+            obj.data_dict[self._adt] = bound_obj
+            obj.invalidate()
         return bound_obj
 
     @property
@@ -198,6 +436,47 @@ class LazyObjectField(AdvertisingDataField):
     # instance the attribute name it has and the class it is on.
 
 
+class _TrackedDict(OrderedDict):
+    """Ordered dictionary that discards the cached encoding of ``advertisement`` whenever it
+    changes. Used for `Advertisement.data_dict` and `ManufacturerData.data` of mutable
+    advertisements, so that direct writes are seen as well as those made by data fields."""
+
+    def __init__(self, advertisement, *args):
+        self.advertisement = advertisement
+        super().__init__(*args)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.advertisement.invalidate()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.advertisement.invalidate()
+
+    def clear(self):
+        super().clear()
+        self.advertisement.invalidate()
+
+    def pop(self, key, *default):
+        value = super().pop(key, *default)
+        self.advertisement.invalidate()
+        return value
+
+    def popitem(self, *args):
+        item = super().popitem(*args)
+        self.advertisement.invalidate()
+        return item
+
+    def setdefault(self, key, default=None):
+        value = super().setdefault(key, default)
+        self.advertisement.invalidate()
+        return value
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.advertisement.invalidate()
+
+
 class Advertisement:
     """Core Advertisement type.
 
@@ -207,8 +486,24 @@ class Advertisement:
 
     match_prefixes = ()
     """For Advertisement, `matches` will always return True. Subclasses may override this value."""
-    # cached bytes of merged prefixes.
-    _prefix_bytes = None
+    match_all_prefixes = True
+    """If ``True``, `matches` requires all of `match_prefixes` to match, otherwise any of them.
+    Subclasses may override this value."""
+
+    # Scanned advertisements are kept in large numbers, so keep the common attributes out of the
+    # instance dictionary. It is only created when a lazy field is bound.
+    __slots__ = (
+        "_advertisement_bytes",
+        "_data_dict",
+        "_encoded",
+        "_cache_encoded",
+        "address",
+        "_rssi",
+        "connectable",
+        "scan_response",
+        "mutable",
+        "__dict__",
+    )
 
     flags = LazyObjectField(AdvertisingFlags, "flags", advertising_data_type=0x01)
     short_name = String(advertising_data_type=0x08)
@@ -232,27 +527,89 @@ class Advertisement:
     # """LE Bluetooth device address."""
     # ROLE = 0x1C
     # """LE Role."""
-    #
-    # MAX_LEGACY_DATA_SIZE = 31
-    # """Data size in a regular BLE packet."""
+
+    MAX_LEGACY_DATA_SIZE = 31
+    """Data size in a regular BLE packet."""
+    MAX_EXTENDED_DATA_SIZE = 254
+    """Data size in a single extended advertising packet."""
 
     def __init__(self, *, entry=None):
-        """Create an empty advertising packet or one from a ScanEntry."""
+        """Create an empty advertising packet or one from a ScanEntry.
+
+        Advertisements created from a ScanEntry are decoded lazily: `data_dict` is only built
+        the first time a data field is accessed."""
         if entry:
-            self.data_dict = decode_data(entry.advertisement_bytes)
+            self._advertisement_bytes = entry.advertisement_bytes
+            self._data_dict = None
+            self._encoded = None
+            # The decoded data_dict isn't tracked, so scanned advertisements are encoded
+            # every time.
+            self._cache_encoded = False
             self.address = entry.address
             self._rssi = entry.rssi  # pylint: disable=protected-access
             self.connectable = entry.connectable
             self.scan_response = entry.scan_response
             self.mutable = False
         else:
-            self.data_dict = {}
+            self._advertisement_bytes = None
+            self._data_dict = _TrackedDict(self)
+            self._encoded = None
+            self._cache_encoded = True
             self.address = None
             self._rssi = None
             self.connectable = False
             self.mutable = True
             self.scan_response = False
 
+    @property
+    def advertisement_bytes(self):
+        """The raw bytes the advertisement was scanned from. For advertisements that were not
+        scanned, this is the current encoding, as returned by ``bytes()``."""
+        if self._advertisement_bytes is not None:
+            return self._advertisement_bytes
+        return bytes(self)
+
+    @property
+    def data_dict(self):
+        """Dictionary of the advertising data structures, keyed by advertising data type.
+        Decoded from the scanned bytes on first access for scanned advertisements. Writes to it
+        discard the cached encoding. Changes made in place to its values, such as a `bytearray`
+        or a list of repeated structures, need a call to `invalidate`."""
+        if self._data_dict is None:
+            self._data_dict = decode_data(self._advertisement_bytes, zero_copy=True)
+        return self._data_dict
+
+    @data_dict.setter
+    def data_dict(self, value):
+        self._data_dict = value
+        # The scanned bytes no longer describe this advertisement.
+        self._advertisement_bytes = None
+        # Writes to a dictionary that isn't tracked can't be seen, so stop caching.
+        self.invalidate(
+            writable_view=not (
+                isinstance(value, _TrackedDict) and value.advertisement is self
+            )
+        )
+
+    def first_value(self, adt):
+        """Returns the value of the first structure of the given advertising data type, or
+        ``None`` if it isn't present."""
+        value = self.data_dict.get(adt, None)
+        if isinstance(value, list):
+            return value[0]
+        return value
+
+    def invalidate(self, *, writable_view=False):
+        """Discard the cached encoding of this advertisement. The data field descriptors and
+        writes to `data_dict` call this. Call it after changing a value of `data_dict` in place.
+
+        :param bool writable_view: ``True`` when a writable view into `data_dict` has been handed
+            out. Changes made through it cannot be tracked, so the encoding is no longer cached.
+        """
+        self._encoded = None
+        if writable_view:
+            self._cache_encoded = False
+
     @property
     def rssi(self):
         """Signal strength of the scanned advertisement. Only available on Advertisements returned
@@ -264,28 +621,32 @@ class Advertisement:
         """Return a merged version of match_prefixes as a single bytes object,
         with length headers.
         """
-        # Check for deprecated `prefix` class attribute.
-        cls._prefix_bytes = getattr(cls, "prefix", None)
-        # Do merge once and memoize it.
-        if cls._prefix_bytes is None:
-            cls._prefix_bytes = (
-                b""
-                if cls.match_prefixes is None
-                else b"".join(
-                    len(prefix).to_bytes(1, "little") + prefix
-                    for prefix in cls.match_prefixes
+        # Do merge once per class and memoize it. The cache is keyed by class so that
+        # subclasses don't inherit the merged prefixes of their parent.
+        prefix_bytes = _prefix_bytes_cache.get(cls, None)
+        if prefix_bytes is None:
+            # Check for deprecated `prefix` class attribute.
+            prefix_bytes = getattr(cls, "prefix", None)
+            if prefix_bytes is None:
+                prefix_bytes = (
+                    b""
+                    if cls.match_prefixes is None
+                    else b"".join(
+                        len(prefix).to_bytes(1, "little") + prefix
+                        for prefix in cls.match_prefixes
+                    )
                 )
-            )
-
-        return cls._prefix_bytes
+            _prefix_bytes_cache[cls] = prefix_bytes
+        return prefix_bytes
 
     @classmethod
     def matches(cls, entry):
         """Returns ``True`` if the given `_bleio.ScanEntry` advertisement fields
-        matches all of the given prefixes in the `match_prefixes` tuple attribute.
-        Subclasses may override this to match any instead of all.
+        matches all of the given prefixes in the `match_prefixes` tuple attribute,
+        or any of them when `match_all_prefixes` is ``False``.
+        Subclasses may override this to match differently.
         """
-        return cls.matches_prefixes(entry, all_=True)
+        return cls.matches_prefixes(entry, all_=cls.match_all_prefixes)
 
     @classmethod
     def matches_prefixes(cls, entry, *, all_):
@@ -298,30 +659,125 @@ class Advertisement:
         return entry.matches(cls.get_prefix_bytes(), all=all_)
 
     def __bytes__(self):
-        """The raw packet bytes."""
-        return encode_data(self.data_dict)
+        """The raw packet bytes. The encoding is cached until the advertisement changes."""
+        if self._encoded is not None:
+            return self._encoded
+        encoded = encode_data(self.data_dict)
+        if self._cache_encoded:
+            self._encoded = encoded
+        return encoded
+
+    def pack_into(self, buffer, offset=0):
+        """Packs the advertisement into ``buffer`` at ``offset`` without allocating a new bytes
+        object. Returns the number of bytes written."""
+        if self._encoded is None:
+            return encode_data_into(self.data_dict, buffer, offset)
+        length = len(self._encoded)
+        if offset + length > len(buffer):
+            raise ValueError("Buffer too small")
+        buffer[offset : offset + length] = self._encoded
+        return length
+
+    @classmethod
+    def data_fields(cls):
+        """Returns a tuple of (name, field, advertising data type) for every
+        `AdvertisingDataField` of the class, in sorted name order. The advertising data type
+        is ``None`` for fields that span several types. Collected once per class."""
+        registry = _field_registries.get(cls, None)
+        if registry is None:
+            fields = []
+            by_type = {}
+            for attr in dir(cls):
+                attribute_instance = getattr(cls, attr)
+                if isinstance(attribute_instance, AdvertisingDataField):
+                    adt = getattr(attribute_instance, "advertising_data_type", None)
+                    fields.append((attr, attribute_instance, adt))
+                    if adt is not None:
+                        by_type[adt] = by_type.get(adt, ()) + (attr,)
+            registry = (tuple(fields), by_type)
+            _field_registries[cls] = registry
+        return registry[0]
+
+    @classmethod
+    def fields_for_type(cls, adt):
+        """Returns the names of the fields of the class that hold the given advertising data
+        type."""
+        cls.data_fields()
+        return _field_registries[cls][1].get(adt, ())
+
+    def _present_fields(self):
+        """Iterates over the (name, value) of the fields that have a value."""
+        for attr, _, adt in self.data_fields():
+            if adt is not None and self.first_value(adt) is None:
+                # Skip fields whose data isn't present. Getting lazy objects and mutable
+                # service data would add them.
+                continue
+            value = getattr(self, attr)
+            if value is not None:
+                yield attr, value
+
+    def to_dict(self):
+        """Returns a dictionary of the data fields that are present, keyed by field name.
+        Values are converted to plain types: `memoryview` and `bytearray` values to bytes, nested
+        fields with ``to_dict``, such as `AdvertisingFlags` and manufacturer data, to
+        dictionaries and other sequences, such as service lists, to lists of strings."""
+        result = {}
+        for attr, value in self._present_fields():
+            if isinstance(value, (memoryview, bytearray)):
+                value = bytes(value)
+            elif hasattr(value, "to_dict"):
+                value = value.to_dict()
+            elif not isinstance(value, (str, bytes, int, tuple)) and hasattr(
+                value, "__iter__"
+            ):
+                value = [str(item) for item in value]
+            result[attr] = value
+        return result
 
     def __str__(self):
-        parts = []
-        for attr in dir(self.__class__):
-            attribute_instance = getattr(self.__class__, attr)
-            if issubclass(attribute_instance.__class__, AdvertisingDataField):
-                if (
-                    issubclass(attribute_instance.__class__, LazyObjectField)
-                    and not attribute_instance.advertising_data_type in self.data_dict
-                ):
-                    # Skip uninstantiated lazy objects; if we get
-                    # their value, they will be be instantiated.
-                    continue
-                value = getattr(self, attr)
-                if value is not None:
-                    parts.append("{}={}".format(attr, str(value)))
+        parts = [
+            "{}={}".format(attr, str(value)) for attr, value in self._present_fields()
+        ]
         return "<{} {} >".format(self.__class__.__name__, " ".join(parts))
 
     def __len__(self):
+        if self._encoded is not None:
+            return len(self._encoded)
         return compute_length(self.data_dict)
 
+    def __bool__(self):
+        if self._data_dict is None:
+            # Not decoded yet. Avoid decoding just to check for emptiness.
+            raw = self._advertisement_bytes
+            return len(raw) > 0 and raw[0] != 0
+        return len(self._data_dict) > 0
+
     def __repr__(self):
-        return "Advertisement(data={})".format(
-            to_bytes_literal(encode_data(self.data_dict))
-        )
+        return "Advertisement(data={})".format(to_bytes_literal(bytes(self)))
+
+
+class TemplateField:
+    """Descriptor for a value at a fixed offset in the payload of an `AdvertisementTemplate`.
+    Setting it packs the value straight into the payload."""
+
+    def __init__(self, codec, offset, *, element_count=1, tuple_type=None):
+        self._codec = codec
+        self.offset = offset
+        self._element_count = element_count
+        self._tuple_type = tuple_type
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        values = self._codec.unpack_from(obj.payload, self.offset)
+        if self._element_count == 1:
+            return values[0]
+        if self._tuple_type:
+            return self._tuple_type(*values)
+        return values
+
+    def __set__(self, obj, value):
+        if self._element_count == 1:
+            self._codec.pack_into(obj.payload, self.offset, value)
+        else:
+            self._codec.pack_into(obj.payload, self.offset, *value)
@@ -50,3 +50,5 @@ class AdafruitColor(Advertisement):
     )
     color = ManufacturerDataField(_COLOR_DATA_ID, "<I")
     """Color to broadcast as RGB integer."""
+
+    __slots__ = ()
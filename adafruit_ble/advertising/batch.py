@@ -0,0 +1,279 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+:py:mod:`~adafruit_ble.advertising.batch`
+====================================================
+
+This module decodes large sets of raw advertisement payloads, such as ones recorded by a
+scanner, into columnar arrays. No Python object is created per packet, so millions of packets
+can be filtered and aggregated cheaply.
+
+Columns are NumPy arrays when NumPy is available and `array.array` objects otherwise.
+
+"""
+
+from array import array
+
+from . import compile_struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__version__ = "0.0.0-auto.0"
+__repo__ = "https://github.com/adafruit/Adafruit_CircuitPython_BLE.git"
+
+_MANUFACTURER_DATA_ADT = 0xFF
+_STANDARD_SERVICE_ADTS = (0x02, 0x03, 0x14, 0x16)
+_VENDOR_SERVICE_ADTS = (0x06, 0x07, 0x15, 0x21)
+# Service data only carries a single UUID in front of its data.
+_SERVICE_DATA_ADTS = (0x16, 0x21)
+# struct formats that can be stored in an array.array column.
+_ARRAY_TYPECODES = "bBhHiIlLqQfd"
+_UINT16 = compile_struct("<H")
+
+
+class ManufacturerColumn:
+    """Selects a single value from manufacturer specific data to decode into a column.
+
+    :param int company_id: only manufacturer data for this company is decoded
+    :param str value_format: `struct` format of the value. It must hold a single integer or
+        floating point value that `array.array` can store, such as ``"<H"`` or ``"<f"``.
+    :param int key: key of the value when the manufacturer data is key encoded like an
+        advertisement, as `ManufacturerData` does. If ``None``, the value is read at
+        ``offset`` bytes after the company id.
+    :param str key_encoding: `struct` format of the keys
+    :param int offset: offset of the value when ``key`` is ``None``
+    :param default: value used for packets that don't carry the value
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(
+        self,
+        company_id,
+        value_format,
+        *,
+        key=None,
+        key_encoding="B",
+        offset=0,
+        default=0
+    ):
+        self.typecode = value_format.lstrip("<>!=@")
+        if len(self.typecode) != 1 or self.typecode not in _ARRAY_TYPECODES:
+            raise ValueError(
+                "value_format must hold a single integer or floating point value"
+            )
+        self.company_id = company_id
+        self.key = key
+        self.offset = offset
+        self.default = default
+        self._struct = compile_struct(value_format)
+        self._key_struct = compile_struct(key_encoding)
+
+    def find(self, payload, start, end):
+        """Returns the value in the manufacturer data held in ``payload[start:end]``, after the
+        company id, or ``None`` if it isn't present."""
+        if self.key is None:
+            start += self.offset
+            if start + self._struct.size > end:
+                return None
+            return self._struct.unpack_from(payload, start)[0]
+        key_size = self._key_struct.size
+        while start < end:
+            item_length = payload[start]
+            if item_length == 0 or start + 1 + item_length > end:
+                return None
+            if self._key_struct.unpack_from(payload, start + 1)[0] == self.key:
+                if item_length - key_size < self._struct.size:
+                    return None
+                return self._struct.unpack_from(payload, start + 1 + key_size)[0]
+            start += 1 + item_length
+        return None
+
+
+class AdvertisementBatch:
+    """Columnar view of a batch of decoded advertisement payloads.
+
+    Packet columns have one entry per payload:
+
+    * ``address``: the address bytes as a little endian integer
+    * ``rssi``
+    * ``timestamp``
+    * ``length``: payload length
+    * ``first_structure``: index of the first structure of the packet in the structure
+      columns. It has an extra final entry, so the structures of packet ``i`` are
+      ``first_structure[i]`` up to ``first_structure[i + 1]``.
+    * one column for each `ManufacturerColumn` requested
+
+    Structure columns have one entry per AD structure:
+
+    * ``packet``: index of the packet that holds the structure
+    * ``adt``: advertising data type
+    * ``offset``: offset of the structure value within its packet
+    * ``value_length``: length of the structure value
+    * ``company_id``: company id of manufacturer data structures, -1 for others
+
+    Service columns have one entry per service UUID, from service lists, solicited service
+    lists and service data:
+
+    * ``service_packet``, ``service_adt`` and ``service_uuid`` for 16-bit UUIDs
+    * ``vendor_service_packet``, ``vendor_service_adt`` and ``vendor_service_uuid`` for
+      128-bit UUIDs. ``vendor_service_uuid`` holds 16 bytes per UUID.
+
+    The ``service_adt`` columns hold the advertising data type the UUID was found in, so
+    provided services (0x02, 0x03, 0x06 and 0x07), solicited services (0x14 and 0x15) and
+    service data (0x16 and 0x21) can be told apart.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.count = len(columns["rssi"])
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def _address_value(address):
+    if address is None:
+        return 0
+    address = getattr(address, "address_bytes", address)
+    return int.from_bytes(bytes(address), "little")
+
+
+def _to_numpy(column):
+    if isinstance(column, (bytes, bytearray)):
+        return numpy.frombuffer(column, dtype=numpy.uint8).reshape(-1, 16)
+    return numpy.frombuffer(column, dtype=column.typecode)
+
+
+def _find_manufacturer_values(manufacturer_columns, found, payload, start, stop):
+    """Adds the values of ``manufacturer_columns`` that are held by the manufacturer data in
+    ``payload[start:stop]``, and aren't in ``found`` yet, to ``found``. Returns the company
+    id."""
+    company_id = _UINT16.unpack_from(payload, start)[0]
+    for name, column in manufacturer_columns.items():
+        if name not in found and column.company_id == company_id:
+            value = column.find(payload, start + 2, stop)
+            if value is not None:
+                found[name] = value
+    return company_id
+
+
+def decode_batch(
+    payloads,
+    *,
+    addresses=None,
+    rssi=None,
+    timestamps=None,
+    manufacturer_columns=None,
+    use_numpy=True
+):
+    """Decodes many raw advertisement payloads into an `AdvertisementBatch`.
+
+    :param iterable payloads: raw advertisement bytes, one per packet
+    :param iterable addresses: `_bleio.Address` objects or address bytes, in the same order
+        as ``payloads``
+    :param iterable rssi: signal strengths, in the same order as ``payloads``
+    :param iterable timestamps: reception times, in the same order as ``payloads``
+    :param dict manufacturer_columns: maps column names to `ManufacturerColumn` objects
+    :param bool use_numpy: return NumPy arrays when NumPy is available
+    :rtype: AdvertisementBatch
+    """
+    # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+    manufacturer_columns = manufacturer_columns or {}
+    columns = {
+        "address": array("Q"),
+        "rssi": array("h"),
+        "timestamp": array("d"),
+        "length": array("H"),
+        "first_structure": array("L"),
+        "packet": array("L"),
+        "adt": array("B"),
+        "offset": array("H"),
+        "value_length": array("B"),
+        "company_id": array("l"),
+        "service_packet": array("L"),
+        "service_adt": array("B"),
+        "service_uuid": array("H"),
+        "vendor_service_packet": array("L"),
+        "vendor_service_adt": array("B"),
+        "vendor_service_uuid": bytearray(),
+    }
+    for name, column in manufacturer_columns.items():
+        if name in columns:
+            raise ValueError("Column {} already exists".format(name))
+        columns[name] = array(column.typecode)
+
+    address_iter = iter(addresses) if addresses is not None else None
+    rssi_iter = iter(rssi) if rssi is not None else None
+    timestamp_iter = iter(timestamps) if timestamps is not None else None
+
+    packet = 0
+    for payload in payloads:
+        columns["address"].append(
+            _address_value(next(address_iter) if address_iter else None)
+        )
+        columns["rssi"].append(next(rssi_iter) if rssi_iter else 0)
+        columns["timestamp"].append(next(timestamp_iter) if timestamp_iter else 0.0)
+        columns["length"].append(len(payload))
+        columns["first_structure"].append(len(columns["adt"]))
+        found = {}
+        i = 0
+        end = len(payload)
+        while i < end:
+            item_length = payload[i]
+            if item_length == 0 or i + 1 + item_length > end:
+                break
+            adt = payload[i + 1]
+            start = i + 2
+            stop = i + 1 + item_length
+            columns["packet"].append(packet)
+            columns["adt"].append(adt)
+            columns["offset"].append(start)
+            columns["value_length"].append(stop - start)
+            company_id = -1
+            if adt == _MANUFACTURER_DATA_ADT and stop - start >= 2:
+                company_id = _find_manufacturer_values(
+                    manufacturer_columns, found, payload, start, stop
+                )
+            elif adt in _STANDARD_SERVICE_ADTS:
+                if adt in _SERVICE_DATA_ADTS:
+                    stop = min(stop, start + 2)
+                for uuid_offset in range(start, stop - 1, 2):
+                    columns["service_packet"].append(packet)
+                    columns["service_adt"].append(adt)
+                    columns["service_uuid"].append(
+                        _UINT16.unpack_from(payload, uuid_offset)[0]
+                    )
+            elif adt in _VENDOR_SERVICE_ADTS:
+                if adt in _SERVICE_DATA_ADTS:
+                    stop = min(stop, start + 16)
+                for uuid_offset in range(start, stop - 15, 16):
+                    columns["vendor_service_packet"].append(packet)
+                    columns["vendor_service_adt"].append(adt)
+                    columns["vendor_service_uuid"].extend(
+                        payload[uuid_offset : uuid_offset + 16]
+                    )
+            columns["company_id"].append(company_id)
+            i += 1 + item_length
+        for name, column in manufacturer_columns.items():
+            columns[name].append(found.get(name, column.default))
+        packet += 1
+    columns["first_structure"].append(len(columns["adt"]))
+
+    if use_numpy and numpy is not None:
+        columns = {name: _to_numpy(column) for name, column in columns.items()}
+    return AdvertisementBatch(columns)
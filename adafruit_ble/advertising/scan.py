@@ -0,0 +1,337 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+:py:mod:`~adafruit_ble.advertising.scan`
+====================================================
+
+This module classifies raw scan entries into `Advertisement` types and filters them before any
+advertisement is created. `BLERadio.start_scan` uses it for every scan.
+
+"""
+
+from . import Advertisement, compile_struct
+
+__version__ = "0.0.0-auto.0"
+__repo__ = "https://github.com/adafruit/Adafruit_CircuitPython_BLE.git"
+
+
+def _matches_function(adv_type):
+    """Returns the function behind the `Advertisement.matches` classmethod of ``adv_type``, or
+    ``None`` where bound methods don't expose it."""
+    try:
+        return adv_type.matches.__func__
+    except AttributeError:
+        return None
+
+
+_DEFAULT_MATCHES = _matches_function(Advertisement)
+
+
+def _find_prefixes(by_length, data, start, end, found):
+    """Looks up the prefixes of the structure ``data[start:end]``, which starts with its data
+    type, in the ``(prefix length, {prefix: hits})`` tuples ``by_length`` of a `ScanPlan` table.
+    The bits of each hit are added to ``found``, keyed by type index."""
+    for prefix_length, by_prefix in by_length:
+        if start + prefix_length > end:
+            break
+        hits = by_prefix.get(bytes(data[start : start + prefix_length]))
+        if hits:
+            for index, bit in hits:
+                found[index] = found.get(index, 0) | bit
+
+
+class ScanPlan:
+    """Classifies scan entries into the most specific of a set of `Advertisement` types. Make
+    one with `compile_scan_plan`.
+
+    The `match_prefixes` of every type are compiled into a table keyed by advertising data
+    type and prefix, so classifying an entry looks at each of its data structures once,
+    however many types are requested. Types that override `Advertisement.matches` have their
+    `matches` called instead.
+    """
+
+    def __init__(self, advertisement_types):
+        # pylint: disable=too-many-locals
+        if not advertisement_types:
+            advertisement_types = (Advertisement,)
+        self.advertisement_types = advertisement_types
+        all_prefix_bytes = tuple(adv.get_prefix_bytes() for adv in advertisement_types)
+        # If one of the advertisement_types has no prefix restrictions, then
+        # no prefixes should be specified at all, so we match everything.
+        self.prefixes = b"" if b"" in all_prefix_bytes else b"".join(all_prefix_bytes)
+        """Merged prefixes of all the types, to pass to `_bleio.Adapter.start_scan`."""
+
+        # Types that match every entry, types whose matches() must be called and, for the
+        # others, the bit mask of prefixes that must match (all) or any of which may match.
+        always = []
+        custom = []
+        self._required = {}
+        self._match_all = {}
+        table = {}
+        for index, adv_type in enumerate(advertisement_types):
+            prefixes = adv_type.match_prefixes
+            # Where bound methods don't expose __func__, call every type's matches().
+            matches = _matches_function(adv_type)
+            if (
+                matches is None
+                or matches is not _DEFAULT_MATCHES
+                or getattr(adv_type, "prefix", None) is not None
+            ):
+                custom.append(index)
+                continue
+            if not prefixes:
+                always.append(index)
+                continue
+            if b"" in prefixes:
+                custom.append(index)
+                continue
+            self._required[index] = (1 << len(prefixes)) - 1
+            self._match_all[index] = adv_type.match_all_prefixes
+            for bit, prefix in enumerate(prefixes):
+                by_length = table.setdefault(prefix[0], {})
+                by_prefix = by_length.setdefault(len(prefix), {})
+                by_prefix[prefix] = by_prefix.get(prefix, ()) + ((index, 1 << bit),)
+        self._always = tuple(always)
+        self._custom = tuple(custom)
+        self._table = {
+            adt: tuple(sorted(by_length.items())) for adt, by_length in table.items()
+        }
+
+        # Resolution order: a later matching type replaces the current one only if it is a
+        # subclass of it. Precompute the subclass relation once.
+        self._refines = {}
+        for index, adv_type in enumerate(advertisement_types):
+            self._refines[index] = frozenset(
+                other
+                for other, other_type in enumerate(advertisement_types)
+                if issubclass(other_type, adv_type)
+            )
+        self._requested = frozenset(advertisement_types)
+
+    def _matched(self, entry):
+        """Returns the indices of the types that match ``entry``, in ascending order."""
+        matched = list(self._always)
+        for index in self._custom:
+            if self.advertisement_types[index].matches(entry):
+                matched.append(index)
+        if not self._table:
+            if self._custom:
+                matched.sort()
+            return matched
+        found = {}
+        data = entry.advertisement_bytes
+        table = self._table
+        i = 0
+        end = len(data)
+        while i < end:
+            item_length = data[i]
+            if item_length == 0:
+                break
+            by_length = table.get(data[i + 1] if i + 1 < end else None, None)
+            if by_length is not None:
+                _find_prefixes(
+                    by_length, data, i + 1, min(i + 1 + item_length, end), found
+                )
+            i += 1 + item_length
+        for index, bits in found.items():
+            if bits == self._required[index] or not self._match_all[index]:
+                matched.append(index)
+        matched.sort()
+        return matched
+
+    def classify(self, entry):
+        """Returns the most specific requested `Advertisement` type that matches ``entry``, or
+        ``None`` if there isn't one. The result is the same as checking each type's
+        `Advertisement.matches` in order."""
+        adv_type = Advertisement
+        current = None
+        for index in self._matched(entry):
+            if current is None:
+                # Every Advertisement type refines the base Advertisement.
+                if issubclass(self.advertisement_types[index], Advertisement):
+                    current = index
+            elif index in self._refines[current]:
+                current = index
+        if current is not None:
+            adv_type = self.advertisement_types[current]
+        # Double check the adv_type is requested. We may return Advertisement accidentally
+        # otherwise.
+        if adv_type not in self._requested:
+            return None
+        return adv_type
+
+    def advertisement(self, entry, scan_filter=None):
+        """Returns ``entry`` as an instance of its `classify` type, or ``None`` if it isn't
+        requested, is rejected by ``scan_filter`` or is empty. The filter is checked before
+        anything is decoded."""
+        if scan_filter is not None and not scan_filter.accepts(entry):
+            return None
+        adv_type = self.classify(entry)
+        if adv_type is None:
+            return None
+        if scan_filter is not None and not scan_filter.accepts_type(
+            adv_type, entry.rssi
+        ):
+            return None
+        advertisement = adv_type(entry=entry)
+        if advertisement:
+            return advertisement
+        return None
+
+
+_COMPANY_ID = compile_struct("<H")
+# Probe kinds of ScanFilter: the value starts the structure data, or is one of the equally
+# sized elements of the structure data.
+_PREFIX_PROBE = 0
+_ELEMENT_PROBE = 1
+
+
+def _probe(adt_probes, data, start, stop):
+    """Returns the bits of the ``(kind, value, bit)`` probes in ``adt_probes`` that the
+    structure data ``data[start:stop]`` passes."""
+    found = 0
+    for kind, value, bit in adt_probes:
+        size = len(value)
+        if kind == _PREFIX_PROBE:
+            if start + size <= stop and data[start : start + size] == value:
+                found |= bit
+            continue
+        for offset in range(start, stop - size + 1, size):
+            if data[offset : offset + size] == value:
+                found |= bit
+                break
+    return found
+
+
+class ScanFilter:
+    """Filters raw scan entries before any `Advertisement` is made from them. Pass one to
+    `BLERadio.start_scan` as ``scan_filter``.
+
+    Every given criterion must pass. Within a criterion, any match passes. All but
+    ``minimum_rssi`` are checked on the raw advertisement bytes, with a single walk over its
+    data structures.
+
+    :param addresses: only accept entries from these `_bleio.Address` objects or address bytes
+    :param company_ids: only accept entries with manufacturer data from one of these companies
+    :param service_uuids: only accept entries that provide one of these service `UUID` objects,
+        by listing it like `ProvideServicesAdvertisement` or carrying service data for it
+    :param solicited_service_uuids: only accept entries that solicit one of these service `UUID`
+        objects, like `SolicitServicesAdvertisement`
+    :param probes: only accept entries with a data structure of one of these
+        (advertising data type, value prefix) pairs
+    :param dict minimum_rssi: maps `Advertisement` types to the minimum rssi of entries of that
+        type or a subclass. When several apply, the highest is used.
+    """
+
+    def __init__(
+        self,
+        *,
+        addresses=None,
+        company_ids=None,
+        service_uuids=None,
+        solicited_service_uuids=None,
+        probes=None,
+        minimum_rssi=None
+    ):
+        self._addresses = None
+        if addresses is not None:
+            self._addresses = frozenset(
+                bytes(getattr(address, "address_bytes", address))
+                for address in addresses
+            )
+        # Maps each advertising data type to (kind, value, criterion bit) probes.
+        self._probes = {}
+        self._required = 0
+        if company_ids is not None:
+            bit = self._add_criterion()
+            for company_id in company_ids:
+                self._add_probe(0xFF, _PREFIX_PROBE, _COMPANY_ID.pack(company_id), bit)
+        if service_uuids is not None:
+            bit = self._add_criterion()
+            for uuid in service_uuids:
+                value = bytes(uuid)
+                if len(value) == 2:
+                    list_types, data_type = (0x02, 0x03), 0x16
+                else:
+                    list_types, data_type = (0x06, 0x07), 0x21
+                for adt in list_types:
+                    self._add_probe(adt, _ELEMENT_PROBE, value, bit)
+                self._add_probe(data_type, _PREFIX_PROBE, value, bit)
+        if solicited_service_uuids is not None:
+            bit = self._add_criterion()
+            for uuid in solicited_service_uuids:
+                value = bytes(uuid)
+                self._add_probe(
+                    0x14 if len(value) == 2 else 0x15, _ELEMENT_PROBE, value, bit
+                )
+        if probes is not None:
+            bit = self._add_criterion()
+            for adt, prefix in probes:
+                self._add_probe(adt, _PREFIX_PROBE, bytes(prefix), bit)
+        self._minimum_rssi = minimum_rssi or {}
+        self._type_minimum_rssi = {}
+
+    def _add_criterion(self):
+        bit = (self._required + 1) & ~self._required
+        self._required |= bit
+        return bit
+
+    def _add_probe(self, adt, kind, value, bit):
+        self._probes[adt] = self._probes.get(adt, ()) + ((kind, value, bit),)
+
+    def accepts(self, entry):
+        """Returns ``True`` if the raw ``entry`` passes the address and data criteria."""
+        if self._addresses is not None:
+            address = entry.address
+            if address is None or address.address_bytes not in self._addresses:
+                return False
+        if not self._required:
+            return True
+        found = 0
+        data = entry.advertisement_bytes
+        probes = self._probes
+        i = 0
+        end = len(data)
+        while i + 1 < end:
+            item_length = data[i]
+            if item_length == 0:
+                break
+            adt_probes = probes.get(data[i + 1], None)
+            if adt_probes is not None:
+                found |= _probe(adt_probes, data, i + 2, min(i + 1 + item_length, end))
+                if found == self._required:
+                    return True
+            i += 1 + item_length
+        return False
+
+    def accepts_type(self, adv_type, rssi):
+        """Returns ``True`` if an entry of ``adv_type`` with ``rssi`` passes the per type
+        minimum rssi."""
+        if not self._minimum_rssi:
+            return True
+        threshold = self._type_minimum_rssi.get(adv_type, False)
+        if threshold is False:
+            threshold = None
+            for other_type, other_threshold in self._minimum_rssi.items():
+                if issubclass(adv_type, other_type) and (
+                    threshold is None or other_threshold > threshold
+                ):
+                    threshold = other_threshold
+            self._type_minimum_rssi[adv_type] = threshold
+        return threshold is None or rssi >= threshold
+
+
+_scan_plans = {}
+
+
+def compile_scan_plan(advertisement_types):
+    """Returns the `ScanPlan` for the tuple of ``advertisement_types``. Plans are cached, so
+    repeated scans for the same types share one."""
+    advertisement_types = tuple(advertisement_types)
+    plan = _scan_plans.get(advertisement_types, None)
+    if plan is None:
+        plan = ScanPlan(advertisement_types)
+        _scan_plans[advertisement_types] = plan
+    return plan
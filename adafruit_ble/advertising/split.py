@@ -0,0 +1,117 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+:py:mod:`~adafruit_ble.advertising.split`
+====================================================
+
+This module distributes the data of an advertisement that is too long for a single packet between
+the advertisement and its scan response.
+
+"""
+
+from . import Advertisement, compute_length
+
+__version__ = "0.0.0-auto.0"
+__repo__ = "https://github.com/adafruit/Adafruit_CircuitPython_BLE.git"
+
+# Placement priority of advertising data types when splitting an advertisement. Lower values are
+# placed first. Types that aren't listed get _DEFAULT_FIELD_PRIORITY.
+FIELD_PRIORITIES = {
+    0x01: 0,  # Flags
+    0x02: 1,  # Incomplete list of 16-bit service UUIDs
+    0x03: 1,  # Complete list of 16-bit service UUIDs
+    0x06: 1,  # Incomplete list of 128-bit service UUIDs
+    0x07: 1,  # Complete list of 128-bit service UUIDs
+    0x14: 1,  # List of 16-bit solicited service UUIDs
+    0x15: 1,  # List of 128-bit solicited service UUIDs
+    0xFF: 2,  # Manufacturer specific data
+    0x16: 3,  # 16-bit UUID service data
+    0x21: 3,  # 128-bit UUID service data
+    0x19: 4,  # Appearance
+    0x0A: 5,  # TX power
+    0x08: 6,  # Short name
+    0x09: 6,  # Complete name
+}
+_DEFAULT_FIELD_PRIORITY = 5
+_FLAGS_ADT = 0x01
+_SHORT_NAME_ADT = 0x08
+_COMPLETE_NAME_ADT = 0x09
+
+
+def _shorten_name(name, max_length):
+    """Truncates the UTF-8 encoded ``name`` to at most ``max_length`` bytes without splitting a
+    character."""
+    if len(name) <= max_length:
+        return name
+    end = max_length
+    # Back up over continuation bytes so we don't cut a character in half.
+    while end > 0 and (name[end] & 0xC0) == 0x80:
+        end -= 1
+    return bytes(name[:end])
+
+
+def split_advertisement(
+    advertisement, *, max_length=Advertisement.MAX_LEGACY_DATA_SIZE, priorities=None
+):
+    """Distributes the data of ``advertisement`` between an advertisement and a scan response
+    that are each at most ``max_length`` bytes long. Fields are placed in order of priority,
+    given by `FIELD_PRIORITIES` updated with ``priorities``. Flags are always kept in the
+    advertisement. If the complete name doesn't fit, it is left out when the advertisement has
+    a short name, and otherwise shortened into a short name that fills the remaining space.
+
+    :return: the advertisement, the scan response and a list of the advertising data types
+        that didn't fit
+    :rtype: tuple(Advertisement, Advertisement, list)
+    """
+    # pylint: disable=too-many-locals
+    field_priorities = FIELD_PRIORITIES
+    if priorities:
+        field_priorities = dict(FIELD_PRIORITIES)
+        field_priorities.update(priorities)
+    fields = sorted(
+        advertisement.data_dict.items(),
+        key=lambda item: field_priorities.get(item[0], _DEFAULT_FIELD_PRIORITY),
+    )
+
+    primary = Advertisement()
+    primary.connectable = advertisement.connectable
+    scan_response = Advertisement()
+    remaining = [max_length, max_length]
+    dropped = []
+    name = None
+    for adt, value in fields:
+        if adt == _COMPLETE_NAME_ADT:
+            # Place the name last, once we know how much room is left for it.
+            name = value
+            continue
+        length = compute_length({adt: value})
+        targets = (primary,) if adt == _FLAGS_ADT else (primary, scan_response)
+        for i, target in enumerate(targets):
+            if length <= remaining[i]:
+                target.data_dict[adt] = value
+                remaining[i] -= length
+                break
+        else:
+            dropped.append(adt)
+
+    if name is not None:
+        name = bytes(name)
+        # Put the name where there is the most room.
+        i = 0 if remaining[0] >= remaining[1] else 1
+        target = (primary, scan_response)[i]
+        short_name = b""
+        if remaining[i] > 2:
+            short_name = _shorten_name(name, remaining[i] - 2)
+        if len(name) + 2 <= remaining[i]:
+            target.data_dict[_COMPLETE_NAME_ADT] = name
+        elif _SHORT_NAME_ADT in advertisement.data_dict:
+            # The advertisement's own short name stands in for the complete name.
+            pass
+        elif short_name:
+            target.data_dict[_SHORT_NAME_ADT] = short_name
+        else:
+            dropped.append(_COMPLETE_NAME_ADT)
+
+    return primary, scan_response, dropped
@@ -11,83 +11,146 @@ even though multiple purposes may actually be present in a single packet.
 
 """
 
-import struct
 from collections import OrderedDict, namedtuple
 
 from . import (
     Advertisement,
     AdvertisingDataField,
+    AdvertisingDataIndex,
+    TemplateField,
+    _TrackedDict,
     encode_data,
+    encode_data_into,
     decode_data,
     to_hex,
     compute_length,
+    compile_struct,
+    starts_with,
 )
 from ..uuid import StandardUUID, VendorUUID
 
 __version__ = "0.0.0-auto.0"
 __repo__ = "https://github.com/adafruit/Adafruit_CircuitPython_BLE.git"
 
+# Company ids and 16-bit UUIDs are both little endian 16-bit integers.
+_UINT16 = compile_struct("<H")
+
+
+def _raw_uuid(key):
+    """Returns the 16-bit integer or the 16 bytes of a UUID, or of the UUID of a Service, without
+    creating any UUID objects. Returns ``None`` for anything else."""
+    uuid = getattr(key, "uuid", key)
+    uuid = getattr(uuid, "bleio_uuid", uuid)
+    size = getattr(uuid, "size", None)
+    if size == 16:
+        return uuid.uuid16
+    if size == 128:
+        return bytes(uuid.uuid128)
+    return None
+
+
+def _first_with_prefix(values, prefix):
+    """Returns the first of ``values``, a `data_dict` value or list of them, that starts with
+    ``prefix``, or ``None``."""
+    if values is None:
+        return None
+    if not isinstance(values, list):
+        return values if starts_with(values, prefix) else None
+    for value in values:
+        if starts_with(value, prefix):
+            return value
+    return None
+
 
 class BoundServiceList:
-    """Sequence-like object of Service UUID objects. It stores both standard and vendor UUIDs."""
+    """Sequence-like object of Service UUID objects. It stores both standard and vendor UUIDs.
+
+    The UUIDs are kept as raw integers and bytes in hash sets, so membership checks don't create
+    UUID objects. UUID objects are only created when iterating."""
+
+    __slots__ = (
+        "_advertisement",
+        "_standard_service_fields",
+        "_vendor_service_fields",
+        "_standard_services",
+        "_vendor_services",
+        "_standard_service_set",
+        "_vendor_service_set",
+    )
 
     def __init__(self, advertisement, *, standard_services, vendor_services):
         self._advertisement = advertisement
         self._standard_service_fields = standard_services
         self._vendor_service_fields = vendor_services
+        # Raw UUIDs in advertised order, plus sets of them for membership checks.
         self._standard_services = []
         self._vendor_services = []
         for adt in standard_services:
-            if adt in self._advertisement.data_dict:
-                data = self._advertisement.data_dict[adt]
-                for i in range(len(data) // 2):
-                    uuid = StandardUUID(data[2 * i : 2 * (i + 1)])
-                    self._standard_services.append(uuid)
+            for data in self._values(adt):
+                for uuid16 in _UINT16.iter_unpack(data[: len(data) // 2 * 2]):
+                    self._standard_services.append(uuid16[0])
         for adt in vendor_services:
-            if adt in self._advertisement.data_dict:
-                data = self._advertisement.data_dict[adt]
-                for i in range(len(data) // 16):
-                    uuid = VendorUUID(data[16 * i : 16 * (i + 1)])
-                    self._vendor_services.append(uuid)
+            for data in self._values(adt):
+                for i in range(0, len(data) // 16 * 16, 16):
+                    self._vendor_services.append(bytes(data[i : i + 16]))
+        self._standard_service_set = set(self._standard_services)
+        self._vendor_service_set = set(self._vendor_services)
+
+    def _values(self, adt):
+        value = self._advertisement.data_dict.get(adt, None)
+        if value is None:
+            return ()
+        if isinstance(value, list):
+            return value
+        return (value,)
 
     def __contains__(self, key):
-        uuid = key
-        if hasattr(key, "uuid"):
-            uuid = key.uuid
-        return uuid in self._vendor_services or uuid in self._standard_services
+        uuid = _raw_uuid(key)
+        return uuid in self._standard_service_set or uuid in self._vendor_service_set
 
     def _update(self, adt, uuids):
         if not uuids:
             # uuids is empty
             del self._advertisement.data_dict[adt]
-        uuid_length = uuids[0].size // 8
-        b = bytearray(len(uuids) * uuid_length)
-        i = 0
-        for uuid in uuids:
-            uuid.pack_into(b, i)
-            i += uuid_length
+            self._advertisement.invalidate()
+            return
+        if isinstance(uuids[0], int):
+            b = bytearray(len(uuids) * _UINT16.size)
+            for i, uuid16 in enumerate(uuids):
+                _UINT16.pack_into(b, i * _UINT16.size, uuid16)
+        else:
+            b = b"".join(uuids)
         self._advertisement.data_dict[adt] = b
+        self._advertisement.invalidate()
 
     def __iter__(self):
-        all_services = list(self._standard_services)
-        all_services.extend(self._vendor_services)
-        return iter(all_services)
+        for uuid16 in self._standard_services:
+            yield StandardUUID(uuid16)
+        for uuid128 in self._vendor_services:
+            yield VendorUUID(uuid128)
+
+    def _add(self, service):
+        """Adds the UUID of the service to the list. Returns the ADT of the list that changed,
+        or ``None`` if the UUID was already present."""
+        uuid = _raw_uuid(service)
+        if isinstance(service.uuid, StandardUUID):
+            if uuid in self._standard_service_set:
+                return None
+            self._standard_services.append(uuid)
+            self._standard_service_set.add(uuid)
+            return self._standard_service_fields[0]
+        if isinstance(service.uuid, VendorUUID):
+            if uuid in self._vendor_service_set:
+                return None
+            self._vendor_services.append(uuid)
+            self._vendor_service_set.add(uuid)
+            return self._vendor_service_fields[0]
+        return None
 
     # TODO: Differentiate between complete and incomplete lists.
     def append(self, service):
         """Append a service to the list."""
-        if (
-            isinstance(service.uuid, StandardUUID)
-            and service not in self._standard_services
-        ):
-            self._standard_services.append(service.uuid)
-            self._update(self._standard_service_fields[0], self._standard_services)
-        elif (
-            isinstance(service.uuid, VendorUUID)
-            and service not in self._vendor_services
-        ):
-            self._vendor_services.append(service.uuid)
-            self._update(self._vendor_service_fields[0], self._vendor_services)
+        self.extend((service,))
 
     # TODO: Differentiate between complete and incomplete lists.
     def extend(self, services):
@@ -95,17 +158,12 @@ class BoundServiceList:
         standard = False
         vendor = False
         for service in services:
-            if (
-                isinstance(service.uuid, StandardUUID)
-                and service.uuid not in self._standard_services
-            ):
-                self._standard_services.append(service.uuid)
+            adt = self._add(service)
+            if adt is None:
+                continue
+            if adt == self._standard_service_fields[0]:
                 standard = True
-            elif (
-                isinstance(service.uuid, VendorUUID)
-                and service.uuid not in self._vendor_services
-            ):
-                self._vendor_services.append(service.uuid)
+            else:
                 vendor = True
 
         if standard:
@@ -115,9 +173,7 @@ class BoundServiceList:
 
     def __str__(self):
         data = []
-        for service_uuid in self._standard_services:
-            data.append(str(service_uuid))
-        for service_uuid in self._vendor_services:
+        for service_uuid in self:
             data.append(str(service_uuid))
         return "<BoundServiceList: {}>".format(", ".join(data))
 
@@ -131,10 +187,10 @@ class ServiceList(AdvertisingDataField):
 
     def _present(self, obj):
         for adt in self.standard_services:
-            if adt in obj.data_dict:
+            if obj.first_value(adt) is not None:
                 return True
         for adt in self.vendor_services:
-            if adt in obj.data_dict:
+            if obj.first_value(adt) is not None:
                 return True
         return False
 
@@ -156,9 +212,14 @@ class ProvideServicesAdvertisement(Advertisement):
 
     # Prefixes that match each ADT that can carry service UUIDs.
     match_prefixes = (b"\x02", b"\x03", b"\x06", b"\x07")
+    # Only one kind of service list need be present in a ProvideServicesAdvertisement,
+    # so match any prefix, not all.
+    match_all_prefixes = False
     services = ServiceList(standard_services=[0x02, 0x03], vendor_services=[0x06, 0x07])
     """List of services the device can provide."""
 
+    __slots__ = ("adv_service_lists",)
+
     def __init__(self, *services, entry=None):
         super().__init__(entry=entry)
         if entry:
@@ -172,13 +233,6 @@ class ProvideServicesAdvertisement(Advertisement):
         self.flags.general_discovery = True
         self.flags.le_only = True
 
-    @classmethod
-    def matches(cls, entry):
-        """Only one kind of service list need be present in a ProvideServicesAdvertisement,
-        so override the default behavior and match any prefix, not all.
-        """
-        return cls.matches_prefixes(entry, all_=False)
-
 
 class SolicitServicesAdvertisement(Advertisement):
     """Advertise what services the device would like to use over a connection."""
@@ -189,6 +243,8 @@ class SolicitServicesAdvertisement(Advertisement):
     solicited_services = ServiceList(standard_services=[0x14], vendor_services=[0x15])
     """List of services the device would like to use."""
 
+    __slots__ = ("adv_service_lists",)
+
     def __init__(self, *services, entry=None):
         super().__init__(entry=entry)
         if entry:
@@ -209,6 +265,8 @@ class ManufacturerData(AdvertisingDataField):
     `ManufacturerDataField` attributes are set in - this can be useful for
     `match_prefixes` in an `Advertisement` sub-class."""
 
+    __slots__ = ("_obj", "_company_id", "_adt", "data", "company_id", "_key_encoding")
+
     def __init__(
         self, obj, *, advertising_data_type=0xFF, company_id, key_encoding="B"
     ):
@@ -216,27 +274,63 @@ class ManufacturerData(AdvertisingDataField):
         self._company_id = company_id
         self._adt = advertising_data_type
 
-        self.data = OrderedDict()  # makes field order match order they are set in
+        data = OrderedDict()  # makes field order match order they are set in
         self.company_id = company_id
-        encoded_company = struct.pack("<H", company_id)
-        if 0xFF in obj.data_dict:
-            existing_data = obj.data_dict[0xFF]
-            if isinstance(existing_data, list):
-                for existing in existing_data:
-                    if existing.startswith(encoded_company):
-                        existing_data = existing
-                existing_data = None
-            self.data = decode_data(existing_data[2:], key_encoding=key_encoding)
+        encoded_company = _UINT16.pack(company_id)
+        existing = _first_with_prefix(
+            obj.data_dict.get(self._adt, None), encoded_company
+        )
+        if existing is not None:
+            data = decode_data(
+                existing[2:], key_encoding=key_encoding, zero_copy=not obj.mutable
+            )
+        if obj.mutable:
+            # Writes to data change the encoding of obj.
+            data = _TrackedDict(obj, data)
+        self.data = data
         self._key_encoding = key_encoding
 
     def __len__(self):
         return 2 + compute_length(self.data, key_encoding=self._key_encoding)
 
     def __bytes__(self):
-        return struct.pack("<H", self.company_id) + encode_data(
+        return _UINT16.pack(self.company_id) + encode_data(
             self.data, key_encoding=self._key_encoding
         )
 
+    def pack_into(self, buffer, offset=0):
+        """Packs the company id and keyed data into the buffer at the given offset. Returns the
+        number of bytes written."""
+        _UINT16.pack_into(buffer, offset, self.company_id)
+        return 2 + encode_data_into(
+            self.data, buffer, offset + 2, key_encoding=self._key_encoding
+        )
+
+    def value_span(self, index, key):
+        """Returns the (offset, length) of the value for ``key`` within the payload indexed by
+        the `AdvertisingDataIndex` ``index``, or ``None`` if it isn't present."""
+        encoded_company = _UINT16.pack(self.company_id)
+        for offset, length in index.spans(self._adt):
+            if starts_with(index.data[offset : offset + length], encoded_company):
+                keyed_data = AdvertisingDataIndex(
+                    index.data[offset + 2 : offset + length],
+                    key_encoding=self._key_encoding,
+                )
+                for value_offset, value_length in keyed_data.spans(key):
+                    return offset + 2 + value_offset, value_length
+        return None
+
+    def to_dict(self):
+        """Returns a dictionary that maps the company id to a dictionary of the keyed data, as
+        bytes. Values of repeated keys are lists."""
+        data = {}
+        for key, value in self.data.items():
+            if isinstance(value, list):
+                data[key] = [bytes(item) for item in value]
+            else:
+                data[key] = bytes(value)
+        return {self.company_id: data}
+
     def __str__(self):
         hex_data = to_hex(encode_data(self.data, key_encoding=self._key_encoding))
         return "<ManufacturerData company_id={:04x} data={} >".format(
@@ -244,9 +338,12 @@ class ManufacturerData(AdvertisingDataField):
         )
 
 
-class ManufacturerDataField:
+class ManufacturerDataField(AdvertisingDataField):
     """A single piece of data within the manufacturer specific data. The format can be repeated."""
 
+    advertising_data_type = 0xFF
+    """Advertising data type of the manufacturer specific data that holds the field."""
+
     def __init__(self, key, value_format, field_names=None):
         self._key = key
         self._format = value_format
@@ -259,7 +356,8 @@ class ManufacturerDataField:
             raise ValueError(
                 "Provide field_names when multiple values are in the format"
             )
-        self._entry_length = struct.calcsize(value_format)
+        self._struct = compile_struct(value_format)
+        self._entry_length = self._struct.size
         self.field_names = field_names
         if field_names:
             # Mostly, this is to raise a ValueError if field_names has invalid entries
@@ -272,7 +370,7 @@ class ManufacturerDataField:
             return None
         packed = obj.manufacturer_data.data[self._key]
         if self._entry_length == len(packed):
-            unpacked = struct.unpack_from(self._format, packed)
+            unpacked = self._struct.unpack_from(packed)
             if self.element_count == 1:
                 unpacked = unpacked[0]
             if self.field_names and len(self.field_names) == len(unpacked):
@@ -282,18 +380,27 @@ class ManufacturerDataField:
             return unpacked
         if len(packed) % self._entry_length != 0:
             raise RuntimeError("Invalid data length")
-        entry_count = len(packed) // self._entry_length
-        unpacked = [None] * entry_count
-        for i in range(entry_count):
-            offset = i * self._entry_length
-            unpacked[i] = struct.unpack_from(self._format, packed, offset=offset)
-            if self.element_count == 1:
-                unpacked[i] = unpacked[i][0]
-        return tuple(unpacked)
+        if self.element_count == 1:
+            return tuple(entry[0] for entry in self._struct.iter_unpack(packed))
+        return tuple(self._struct.iter_unpack(packed))
+
+    def template_field(self, advertisement, index):
+        """Returns the `TemplateField` for this field in the indexed encoding of
+        ``advertisement``, or ``None`` if it isn't present or is repeated."""
+        span = advertisement.manufacturer_data.value_span(index, self._key)
+        if span is None or span[1] != self._entry_length:
+            return None
+        return TemplateField(
+            self._struct,
+            span[0],
+            element_count=self.element_count,
+            tuple_type=self.mdf_tuple if self.field_names else None,
+        )
 
     def __set__(self, obj, value):
         if not obj.mutable:
             raise AttributeError()
+        obj.invalidate()
         if isinstance(value, tuple) and (
             self.element_count == 1 or isinstance(value[0], tuple)
         ):
@@ -301,19 +408,20 @@ class ManufacturerDataField:
             for i, entry in enumerate(value):
                 offset = i * self._entry_length
                 if self.element_count > 1:
-                    struct.pack_into(self._format, packed, offset, *entry)
+                    self._struct.pack_into(packed, offset, *entry)
                 else:
-                    struct.pack_into(self._format, packed, offset, entry)
+                    self._struct.pack_into(packed, offset, entry)
             obj.manufacturer_data.data[self._key] = bytes(packed)
         elif self.element_count == 1:
-            obj.manufacturer_data.data[self._key] = struct.pack(self._format, value)
+            obj.manufacturer_data.data[self._key] = self._struct.pack(value)
         else:
-            obj.manufacturer_data.data[self._key] = struct.pack(self._format, *value)
+            obj.manufacturer_data.data[self._key] = self._struct.pack(*value)
 
 
 class ServiceData(AdvertisingDataField):
     """Encapsulates service data. It is read as a memoryview which can be manipulated or set as a
-    bytearray to change the size."""
+    bytearray to change the size. Scanned advertisements return the scanned value instead, as
+    bytes or, for large values, a read-only memoryview of the scanned bytes."""
 
     def __init__(self, service):
         if isinstance(service.uuid, StandardUUID):
@@ -322,38 +430,44 @@ class ServiceData(AdvertisingDataField):
             self._adt = 0x21
         self._prefix = bytes(service.uuid)
 
-    def __get__(
-        self, obj, cls
-    ):  # pylint: disable=too-many-return-statements,too-many-branches
+    @property
+    def advertising_data_type(self):
+        """Return the data type value used to indicate this field."""
+        return self._adt
+
+    def __get__(self, obj, cls):  # pylint: disable=too-many-return-statements
         if obj is None:
             return self
-        # If not present at all and mutable, then we init it, otherwise None.
-        if self._adt not in obj.data_dict:
-            if obj.mutable:
-                obj.data_dict[self._adt] = bytearray(self._prefix)
-            else:
+        if not obj.mutable:
+            service_data = _first_with_prefix(
+                obj.data_dict.get(self._adt, None), self._prefix
+            )
+            if service_data is None:
                 return None
+            return service_data[len(self._prefix) :]
+        # The returned memoryview can change the data behind our back.
+        obj.invalidate(writable_view=True)
+        # If not present at all, then we init it.
+        if self._adt not in obj.data_dict:
+            obj.data_dict[self._adt] = bytearray(self._prefix)
 
         all_service_data = obj.data_dict[self._adt]
         # Handle a list of existing data. This doesn't support multiple service data ADTs for the
         # same service.
         if isinstance(all_service_data, list):
             for i, service_data in enumerate(all_service_data):
-                if service_data.startswith(self._prefix):
+                if starts_with(service_data, self._prefix):
                     if not isinstance(service_data, bytearray):
                         service_data = bytearray(service_data)
                         all_service_data[i] = service_data
                     return memoryview(service_data)[len(self._prefix) :]
-            if obj.mutable:
-                service_data = bytearray(self._prefix)
-                all_service_data.append(service_data)
-                return memoryview(service_data)[len(self._prefix) :]
+            service_data = bytearray(self._prefix)
+            all_service_data.append(service_data)
+            return memoryview(service_data)[len(self._prefix) :]
         # Existing data is a single set of bytes.
-        elif isinstance(all_service_data, (bytes, bytearray)):
+        if isinstance(all_service_data, (bytes, bytearray, memoryview)):
             service_data = all_service_data
-            if not bytes(service_data).startswith(self._prefix):
-                if not obj.mutable:
-                    return None
+            if not starts_with(service_data, self._prefix):
                 # Upgrade the value to a list.
                 service_data = bytearray(self._prefix)
                 obj.data_dict[self._adt] = [service_data, service_data]
@@ -370,6 +484,7 @@ class ServiceData(AdvertisingDataField):
         if not isinstance(value, bytearray):
             raise TypeError("Value must be bytearray")
         full_value = bytearray(self._prefix) + value
+        obj.invalidate()
         if self._adt not in obj.data_dict:
             obj.data_dict[self._adt] = full_value
             return
@@ -377,9 +492,9 @@ class ServiceData(AdvertisingDataField):
         all_service_data = obj.data_dict[self._adt]
         if isinstance(all_service_data, list):
             for i, service_data in enumerate(all_service_data):
-                if service_data.startswith(self._prefix):
+                if starts_with(service_data, self._prefix):
                     all_service_data[i] = full_value
                     return
             all_service_data.append(full_value)
-        elif isinstance(all_service_data, (bytes, bytearray)):
+        elif isinstance(all_service_data, (bytes, bytearray, memoryview)):
             obj.data_dict[self._adt] = full_value
@@ -0,0 +1,90 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+:py:mod:`~adafruit_ble.advertising.template`
+====================================================
+
+This module compiles advertisements with a fixed layout into templates whose fields are updated
+in place, so broadcasting changing values doesn't re-encode the whole advertisement.
+
+"""
+
+from . import AdvertisingDataIndex, decode_data, to_bytes_literal
+
+__version__ = "0.0.0-auto.0"
+__repo__ = "https://github.com/adafruit/Adafruit_CircuitPython_BLE.git"
+
+
+class AdvertisementTemplate:
+    """Prebuilt payload of an advertisement with a fixed layout. Created by `compile_template`.
+
+    Fixed size fields of the original advertisement are available as `TemplateField`
+    attributes, so updating one is a single ``pack_into`` on the payload. A template can be
+    passed to `BLERadio.start_advertising` and `BLERadio.update_advertisement` in place of the
+    advertisement."""
+
+    def __init__(self, payload, *, connectable=False):
+        self.payload = payload
+        self.connectable = connectable
+
+    @property
+    def data_dict(self):
+        """Dictionary of the advertising data structures, decoded from the payload."""
+        return decode_data(self.payload)
+
+    def pack_into(self, buffer, offset=0):
+        """Copies the payload into ``buffer`` at ``offset``. Returns the number of bytes
+        written."""
+        length = len(self.payload)
+        if offset + length > len(buffer):
+            raise ValueError("Buffer too small")
+        buffer[offset : offset + length] = self.payload
+        return length
+
+    def __bytes__(self):
+        return bytes(self.payload)
+
+    def __len__(self):
+        return len(self.payload)
+
+    def __repr__(self):
+        return "{}(data={})".format(
+            self.__class__.__name__, to_bytes_literal(self.payload)
+        )
+
+
+_template_classes = {}
+
+
+def compile_template(advertisement):
+    """Compiles ``advertisement`` into an `AdvertisementTemplate` that starts with the same
+    payload. Set every field before compiling: only fields that are present, and whose encoded
+    size is fixed, can be changed on the template.
+
+    Example::
+
+        color = AdafruitColor()
+        color.color = 0
+        template = compile_template(color)
+        template.color = 0x112233
+        radio.start_advertising(template)
+    """
+    cls = advertisement.__class__
+    payload = bytearray(bytes(advertisement))
+    index = AdvertisingDataIndex(payload)
+    fields = {}
+    for attr in dir(cls):
+        attribute_instance = getattr(cls, attr)
+        if hasattr(attribute_instance, "template_field"):
+            field = attribute_instance.template_field(advertisement, index)
+            if field is not None:
+                fields[attr] = field
+    # Share template classes between templates with the same layout.
+    key = (cls, tuple(sorted((name, field.offset) for name, field in fields.items())))
+    template_cls = _template_classes.get(key, None)
+    if template_cls is None:
+        template_cls = type(cls.__name__ + "Template", (AdvertisementTemplate,), fields)
+        _template_classes[key] = template_cls
+    return template_cls(payload, connectable=advertisement.connectable)
@@ -0,0 +1,181 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+:py:mod:`~adafruit_ble.aio`
+====================================================
+
+asyncio support for scanning. Use `BLERadio.scan_async` rather than this module directly:
+
+.. code-block:: python
+
+    import asyncio
+    from adafruit_ble import BLERadio
+
+    async def main():
+        ble = BLERadio()
+        async for advertisement in ble.scan_async(timeout=10):
+            print(advertisement)
+
+    asyncio.run(main())
+
+`_bleio` scans block, so the scan is read on a background thread and handed to the event loop
+through a bounded queue. `scan_advertisements` wraps `AsyncScanIterator` in an async generator,
+so the scan also stops when a loop over it ends early, such as with ``break``. Requires `asyncio`
+and `threading`, which are available on CPython but not CircuitPython.
+
+"""
+
+import asyncio
+import threading
+
+__version__ = "0.0.0-auto.0"
+__repo__ = "https://github.com/adafruit/Adafruit_CircuitPython_BLE.git"
+
+# Queued by the reader when the scan ends.
+_END = object()
+
+
+class _Failure:
+    """Carries an exception raised by the scan to the event loop."""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, exception):
+        self.exception = exception
+
+
+class AsyncScanIterator:
+    """Async iterator over the advertisements of a `BLERadio.start_scan` scan. The scan starts on
+    the first iteration. Closing the iterator, cancelling the task iterating it or reaching the
+    timeout stops the scan with `BLERadio.stop_scan`.
+
+    :param BLERadio radio: the radio to scan with
+    :param tuple advertisement_types: the types passed to `BLERadio.start_scan`
+    :param int queue_size: the maximum number of advertisements waiting for the event loop. The
+        reader stops taking entries from the scan while the queue is full.
+    :param float timeout: the scan timeout in seconds. If None, scans until closed.
+    :param dict scan_kwargs: other keyword arguments for `BLERadio.start_scan`
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self, radio, advertisement_types, *, queue_size=32, timeout=None, scan_kwargs
+    ):
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self._radio = radio
+        self._advertisement_types = advertisement_types
+        self._queue_size = queue_size
+        self._timeout = timeout
+        self._scan_kwargs = scan_kwargs
+        self._loop = None
+        self._queue = None
+        self._deadline = None
+        # Counts free queue slots; the reader thread waits on it while the queue is full.
+        self._slots = threading.Semaphore(queue_size)
+        self._stopped = False
+        self._finished = False
+        self._reader = None
+
+    def __aiter__(self):
+        return self
+
+    def _start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        if self._timeout is not None:
+            self._deadline = self._loop.time() + self._timeout
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _put(self, item):
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        except RuntimeError:
+            # The event loop has been closed.
+            self._stopped = True
+
+    def _read(self):
+        """Runs the blocking scan on the reader thread."""
+        try:
+            for advertisement in self._radio.start_scan(
+                *self._advertisement_types, timeout=self._timeout, **self._scan_kwargs
+            ):
+                self._slots.acquire()
+                if self._stopped:
+                    break
+                self._put(advertisement)
+        except Exception as error:  # pylint: disable=broad-except
+            self._put(_Failure(error))
+        finally:
+            self._put(_END)
+
+    async def __anext__(self):
+        if self._finished:
+            raise StopAsyncIteration
+        if self._loop is None:
+            self._start()
+        try:
+            if self._deadline is None:
+                item = await self._queue.get()
+            else:
+                item = await asyncio.wait_for(
+                    self._queue.get(), max(0, self._deadline - self._loop.time())
+                )
+        except asyncio.TimeoutError:
+            self._stop()
+            raise StopAsyncIteration from None
+        except asyncio.CancelledError:
+            self._stop()
+            raise
+        if item is _END:
+            self._finished = True
+            raise StopAsyncIteration
+        self._slots.release()
+        if isinstance(item, _Failure):
+            self._stop()
+            raise item.exception
+        return item
+
+    def _stop(self):
+        self._finished = True
+        if self._stopped:
+            return
+        self._stopped = True
+        if self._reader is not None:
+            self._radio.stop_scan()
+            # Wake the reader if it is waiting for a queue slot.
+            self._slots.release()
+
+    async def aclose(self):
+        """Stops the scan."""
+        self._stop()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exception_type, exception_value, traceback):
+        await self.aclose()
+
+
+async def scan_advertisements(
+    radio, advertisement_types, *, queue_size=32, timeout=None, scan_kwargs
+):
+    """Async generator over the advertisements of an `AsyncScanIterator`. Leaving an
+    ``async for`` loop over it early closes the generator once it is garbage collected, which
+    stops the scan. Takes the same arguments as `AsyncScanIterator`."""
+    iterator = AsyncScanIterator(
+        radio,
+        advertisement_types,
+        queue_size=queue_size,
+        timeout=timeout,
+        scan_kwargs=scan_kwargs,
+    )
+    try:
+        async for advertisement in iterator:
+            yield advertisement
+    finally:
+        await iterator.aclose()
@@ -0,0 +1,413 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+:py:mod:`~adafruit_ble.capture`
+====================================================
+
+This module records the advertisements produced by `BLERadio.start_scan` into a compact binary
+capture file and reads them back for later analysis. Unlike printing each advertisement, the
+raw advertisement bytes are kept intact.
+
+A capture file starts with a 12 byte header::
+
+    magic (6 bytes, b"BLECAP"), version (1 byte), reserved (1 byte), index interval (uint32)
+
+It is followed by length prefixed records. Every record starts with its body length (uint16)
+and its kind (1 byte). Entry records hold::
+
+    timestamp (double), address (6 bytes), address type (uint8), rssi (int8), flags (uint8),
+    advertisement bytes
+
+Bit 0 of the flags is set for connectable entries and bit 1 for scan responses. Every
+``index_interval`` entries an index record is written that describes the entries written since
+the previous index record::
+
+    previous index offset (uint64), minimum timestamp (double), maximum timestamp (double),
+    offset of the first entry (uint64), entry count (uint32)
+
+When the recorder is closed, a final index record and a 16 byte trailer holding the offset of
+the last index record and the magic ``b"BLECAPIX"`` are written. Readers follow the index records
+backwards from the trailer. Files that weren't closed cleanly are still readable; their records
+are walked instead.
+
+All values are little endian.
+
+Reading capture files requires `mmap`, which is available on CPython but not CircuitPython.
+
+"""
+
+import time
+
+from .advertising import ZERO_COPY_MIN_SIZE, compile_struct
+
+try:
+    import mmap
+except ImportError:
+    mmap = None
+
+__version__ = "0.0.0-auto.0"
+__repo__ = "https://github.com/adafruit/Adafruit_CircuitPython_BLE.git"
+
+_MAGIC = b"BLECAP"
+_TRAILER_MAGIC = b"BLECAPIX"
+_VERSION = 1
+
+_HEADER = compile_struct("<6sBBI")
+_RECORD_HEADER = compile_struct("<HB")
+_ENTRY = compile_struct("<d6sBbB")
+_INDEX = compile_struct("<QddQI")
+_TRAILER = compile_struct("<Q8s")
+
+_ENTRY_RECORD = 0
+_INDEX_RECORD = 1
+
+_CONNECTABLE = 0x01
+_SCAN_RESPONSE = 0x02
+
+# Offset used by the first index record, which has no previous index.
+_NO_INDEX = 0xFFFFFFFFFFFFFFFF
+
+# Largest entry record: the extended advertising limit plus the entry fields.
+_MAX_ENTRY_SIZE = _RECORD_HEADER.size + _ENTRY.size + 255
+
+
+class ScanRecorder:
+    """Appends scan entries to a capture file.
+
+    :param path: path of the capture file to create, or a binary file object opened for writing
+    :param int index_interval: number of entries between index records
+    :param clock: function returning the timestamp of an entry when none is given to `record`
+    """
+
+    def __init__(self, path, *, index_interval=1024, clock=time.time):
+        if index_interval < 1:
+            raise ValueError("index_interval must be at least 1")
+        if isinstance(path, str):
+            self._file = open(path, "wb")  # pylint: disable=consider-using-with
+            self._owns_file = True
+        else:
+            self._file = path
+            self._owns_file = False
+        self._index_interval = index_interval
+        self._clock = clock
+        self._buffer = bytearray(max(_MAX_ENTRY_SIZE, _HEADER.size))
+        self._previous_index = _NO_INDEX
+        # Entries since the last index record: minimum and maximum timestamps, offset of the
+        # first entry and count, as kept by ScanCapture.
+        self._group = [0.0, 0.0, 0, 0]
+        self.count = 0
+        """Number of entries recorded."""
+
+        _HEADER.pack_into(self._buffer, 0, _MAGIC, _VERSION, 0, index_interval)
+        self._offset = 0
+        self._write(_HEADER.size)
+
+    def _write(self, length):
+        self._file.write(memoryview(self._buffer)[:length])
+        self._offset += length
+
+    def record(self, entry, *, timestamp=None):
+        """Records a single entry.
+
+        :param entry: an `Advertisement` produced by `BLERadio.start_scan` or a
+            `_bleio.ScanEntry`
+        :param float timestamp: reception time of the entry. Defaults to the recorder's clock.
+        """
+        if timestamp is None:
+            timestamp = self._clock()
+        data = entry.advertisement_bytes
+        address = entry.address
+        if address is None:
+            address_bytes = bytes(6)
+            address_type = 0
+        else:
+            address_bytes = address.address_bytes
+            address_type = address.type
+        flags = 0
+        if entry.connectable:
+            flags |= _CONNECTABLE
+        if entry.scan_response:
+            flags |= _SCAN_RESPONSE
+        rssi = entry.rssi if entry.rssi is not None else 0
+
+        body_length = _ENTRY.size + len(data)
+        if _RECORD_HEADER.size + body_length > len(self._buffer):
+            raise ValueError("Advertisement too long")
+        _RECORD_HEADER.pack_into(self._buffer, 0, body_length, _ENTRY_RECORD)
+        _ENTRY.pack_into(
+            self._buffer,
+            _RECORD_HEADER.size,
+            timestamp,
+            address_bytes,
+            address_type,
+            rssi,
+            flags,
+        )
+        start = _RECORD_HEADER.size + _ENTRY.size
+        self._buffer[start : start + len(data)] = data
+
+        group = self._group
+        if group[3] == 0:
+            group[0] = timestamp
+            group[1] = timestamp
+            group[2] = self._offset
+        else:
+            group[0] = min(group[0], timestamp)
+            group[1] = max(group[1], timestamp)
+        self._write(start + len(data))
+        group[3] += 1
+        self.count += 1
+        if group[3] >= self._index_interval:
+            self._write_index()
+
+    def record_scan(self, scan):
+        """Records every entry of ``scan``, such as the iterator returned by
+        `BLERadio.start_scan`, and yields it on unchanged."""
+        for entry in scan:
+            self.record(entry)
+            yield entry
+
+    def _write_index(self):
+        index_offset = self._offset
+        _RECORD_HEADER.pack_into(self._buffer, 0, _INDEX.size, _INDEX_RECORD)
+        _INDEX.pack_into(
+            self._buffer, _RECORD_HEADER.size, self._previous_index, *self._group
+        )
+        self._write(_RECORD_HEADER.size + _INDEX.size)
+        self._previous_index = index_offset
+        self._group[3] = 0
+
+    def flush(self):
+        """Flushes recorded entries to the file."""
+        self._file.flush()
+
+    def close(self):
+        """Writes the final index and trailer and closes the file if the recorder opened it."""
+        if self._file is None:
+            return
+        if self._group[3]:
+            self._write_index()
+        _TRAILER.pack_into(self._buffer, 0, self._previous_index, _TRAILER_MAGIC)
+        self._write(_TRAILER.size)
+        self._file.flush()
+        if self._owns_file:
+            self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+
+class CapturedEntry:
+    """A single entry read from a capture file. ``address_bytes`` is `bytes`.
+    ``advertisement_bytes`` is `bytes` too, except for extended advertisements of at least
+    `ZERO_COPY_MIN_SIZE` bytes, which are read only `memoryview` slices of the capture."""
+
+    # pylint: disable=too-few-public-methods,too-many-arguments
+
+    __slots__ = (
+        "timestamp",
+        "address_bytes",
+        "address_type",
+        "rssi",
+        "connectable",
+        "scan_response",
+        "advertisement_bytes",
+    )
+
+    def __init__(
+        self,
+        timestamp,
+        address_bytes,
+        address_type,
+        rssi,
+        connectable,
+        scan_response,
+        advertisement_bytes,
+    ):
+        self.timestamp = timestamp
+        self.address_bytes = address_bytes
+        self.address_type = address_type
+        self.rssi = rssi
+        self.connectable = connectable
+        self.scan_response = scan_response
+        self.advertisement_bytes = advertisement_bytes
+
+    def __repr__(self):
+        return "<CapturedEntry {:.6f} {} rssi={} {}>".format(
+            self.timestamp,
+            ":".join("{:02x}".format(b) for b in reversed(self.address_bytes)),
+            self.rssi,
+            bytes(self.advertisement_bytes).hex(),
+        )
+
+
+class ScanCapture:
+    """Reads a capture file written by `ScanRecorder` through `mmap`.
+
+    Entries are read as they are iterated. Large advertisements are views into the mapped file
+    rather than copies. If entries holding such views are still alive when the capture is
+    closed, the file is unmapped once the last of them is released.
+
+    :param str path: path of the capture file
+    """
+
+    def __init__(self, path):
+        if mmap is None:
+            raise NotImplementedError("Reading captures requires mmap")
+        with open(path, "rb") as capture_file:
+            self._mmap = mmap.mmap(capture_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        if len(self._mmap) < _HEADER.size:
+            self.close()
+            raise ValueError("Not a capture file")
+        magic, version, _, self.index_interval = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError("Not a capture file")
+        # One entry per group of entries: timestamp bounds, offset and count.
+        self._groups = []
+        self._end = len(self._mmap)
+        if not self._read_index():
+            self._walk_records()
+
+    def _read_index(self):
+        """Loads the groups by following index records back from the trailer. Returns
+        ``False`` when the file has no valid trailer."""
+        if self._end - _HEADER.size < _TRAILER.size:
+            return False
+        index_offset, magic = _TRAILER.unpack_from(
+            self._mmap, self._end - _TRAILER.size
+        )
+        if magic != _TRAILER_MAGIC:
+            return False
+        groups = []
+        while index_offset != _NO_INDEX:
+            if index_offset + _RECORD_HEADER.size + _INDEX.size > self._end:
+                return False
+            length, kind = _RECORD_HEADER.unpack_from(self._mmap, index_offset)
+            if kind != _INDEX_RECORD or length != _INDEX.size:
+                return False
+            (
+                index_offset,
+                minimum,
+                maximum,
+                offset,
+                count,
+            ) = _INDEX.unpack_from(self._mmap, index_offset + _RECORD_HEADER.size)
+            groups.append((minimum, maximum, offset, count))
+        groups.reverse()
+        self._groups = groups
+        self._end -= _TRAILER.size
+        return True
+
+    def _walk_records(self):
+        """Builds the groups by walking every record. Used for captures that weren't closed.
+        A truncated final record is ignored."""
+        groups = []
+        offset = _HEADER.size
+        group = None
+        while offset + _RECORD_HEADER.size <= self._end:
+            length, kind = _RECORD_HEADER.unpack_from(self._mmap, offset)
+            record_end = offset + _RECORD_HEADER.size + length
+            if record_end > self._end:
+                break
+            if kind == _INDEX_RECORD:
+                group = None
+            elif kind == _ENTRY_RECORD:
+                timestamp = _ENTRY.unpack_from(
+                    self._mmap, offset + _RECORD_HEADER.size
+                )[0]
+                if group is None:
+                    group = [timestamp, timestamp, offset, 0]
+                    groups.append(group)
+                group[0] = min(group[0], timestamp)
+                group[1] = max(group[1], timestamp)
+                group[3] += 1
+            offset = record_end
+        self._groups = [tuple(group) for group in groups]
+        self._end = offset
+
+    def __len__(self):
+        return sum(group[3] for group in self._groups)
+
+    @property
+    def time_range(self):
+        """Tuple of the earliest and latest timestamps in the capture, or ``None`` if it is
+        empty."""
+        if not self._groups:
+            return None
+        return (
+            min(group[0] for group in self._groups),
+            max(group[1] for group in self._groups),
+        )
+
+    def __iter__(self):
+        return self.entries()
+
+    def entries(self, start=None, end=None):
+        """Iterates over the entries with timestamps from ``start`` up to and including
+        ``end``. Groups of entries outside the range are skipped using the index."""
+        for minimum, maximum, offset, count in self._groups:
+            if (start is not None and maximum < start) or (
+                end is not None and minimum > end
+            ):
+                continue
+            while count:
+                length, kind = _RECORD_HEADER.unpack_from(self._mmap, offset)
+                body = offset + _RECORD_HEADER.size
+                offset = body + length
+                if kind != _ENTRY_RECORD:
+                    continue
+                count -= 1
+                timestamp = _ENTRY.unpack_from(self._mmap, body)[0]
+                if (start is not None and timestamp < start) or (
+                    end is not None and timestamp > end
+                ):
+                    continue
+                yield self._entry(body, offset)
+
+    def _entry(self, body, end):
+        """Returns the `CapturedEntry` of the entry record body from ``body`` to ``end``."""
+        timestamp, address_bytes, address_type, rssi, flags = _ENTRY.unpack_from(
+            self._mmap, body
+        )
+        data_start = body + _ENTRY.size
+        if end - data_start < ZERO_COPY_MIN_SIZE:
+            data = self._mmap[data_start:end]
+        else:
+            data = self._view[data_start:end]
+        return CapturedEntry(
+            timestamp,
+            address_bytes,
+            address_type,
+            rssi,
+            bool(flags & _CONNECTABLE),
+            bool(flags & _SCAN_RESPONSE),
+            data,
+        )
+
+    def close(self):
+        """Unmaps the capture file. If entries still hold views of it, it is unmapped when the
+        last of them is released instead."""
+        if self._mmap is None:
+            return
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Exported views keep the mapping alive; it is closed when it is freed.
+            pass
+        self._mmap = None
+        self._view = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
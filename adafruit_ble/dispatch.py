@@ -0,0 +1,222 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+:py:mod:`~adafruit_ble.dispatch`
+====================================================
+
+Calls handlers registered per `Advertisement` type from a single scan. Usually used through
+`BLERadio.on_advertisement` and `BLERadio.dispatch_scan`:
+
+.. code-block:: python
+
+    from adafruit_ble import BLERadio
+    from adafruit_ble.advertising.adafruit import AdafruitColor
+    from adafruit_ble.advertising.standard import ProvideServicesAdvertisement
+
+    ble = BLERadio()
+    ble.on_advertisement(AdafruitColor, lambda adv: print("color", adv.color))
+    ble.on_advertisement(ProvideServicesAdvertisement, lambda adv: print(adv.services))
+    ble.dispatch_scan(timeout=10)
+
+Matching and decoding run on the thread that runs the scan. Handlers run on a thread pool. Each
+handler has its own bounded queue and is never called concurrently with itself. When a handler
+falls behind, the oldest advertisements in its queue are dropped. The scan and the other
+handlers are not held up. A handler added for several types has a queue for each.
+
+Requires `threading` and `concurrent.futures`, which are available on CPython but not
+CircuitPython.
+
+"""
+
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+__version__ = "0.0.0-auto.0"
+__repo__ = "https://github.com/adafruit/Adafruit_CircuitPython_BLE.git"
+
+# Advertisements a handler processes before its worker is handed to the next queue.
+_DRAIN_BATCH = 16
+
+
+def _print_error(handler, advertisement, error):
+    # pylint: disable=unused-argument
+    traceback.print_exception(type(error), error, error.__traceback__)
+
+
+class _HandlerQueue:
+    """The pending advertisements of one handler."""
+
+    def __init__(self, advertisement_type, handler, queue_size):
+        self.advertisement_type = advertisement_type
+        self.handler = handler
+        self.items = deque()
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.scheduled = False
+        self.lock = threading.Lock()
+
+    def put(self, advertisement):
+        """Queues ``advertisement``. Returns ``True`` if the queue needs a worker."""
+        with self.lock:
+            if len(self.items) >= self.queue_size:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(advertisement)
+            if self.scheduled:
+                return False
+            self.scheduled = True
+            return True
+
+    def drain(self, on_error):
+        """Calls the handler for up to `_DRAIN_BATCH` queued advertisements. Returns ``True`` if
+        advertisements remain and the queue needs a worker again."""
+        finished = False
+        try:
+            for _ in range(_DRAIN_BATCH):
+                with self.lock:
+                    if not self.items:
+                        self.scheduled = False
+                        finished = True
+                        return False
+                    advertisement = self.items.popleft()
+                try:
+                    self.handler(advertisement)
+                except Exception as error:  # pylint: disable=broad-except
+                    on_error(self.handler, advertisement, error)
+            finished = True
+            return True
+        finally:
+            # on_error raised, or the handler raised something other than an Exception. Let the
+            # next put schedule a new worker.
+            if not finished:
+                with self.lock:
+                    self.scheduled = False
+
+
+class ScanDispatcher:
+    """Dispatches scanned advertisements to the handlers registered for their type.
+
+    :param BLERadio radio: the radio to scan with
+    """
+
+    def __init__(self, radio):
+        self._radio = radio
+        self._queues = []
+        # Handler queues for each advertisement type produced by the scan.
+        self._routes = {}
+
+    def add(self, advertisement_type, handler, *, queue_size=64):
+        """Calls ``handler`` with every scanned advertisement that is an instance of
+        ``advertisement_type``.
+
+        :param type advertisement_type: an `Advertisement` class
+        :param handler: function called with each advertisement
+        :param int queue_size: the maximum number of advertisements waiting for the handler
+        """
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self._queues.append(_HandlerQueue(advertisement_type, handler, queue_size))
+        self._routes = {}
+
+    def remove(self, advertisement_type, handler):
+        """Removes a handler added with `add`."""
+        for queue in self._queues:
+            if (
+                queue.advertisement_type is advertisement_type
+                and queue.handler is handler
+            ):
+                self._queues.remove(queue)
+                self._routes = {}
+                return
+        raise ValueError("Handler not registered")
+
+    def __len__(self):
+        return len(self._queues)
+
+    def _route(self, adv_type):
+        queues = self._routes.get(adv_type, None)
+        if queues is None:
+            queues = tuple(
+                queue
+                for queue in self._queues
+                if issubclass(adv_type, queue.advertisement_type)
+            )
+            self._routes[adv_type] = queues
+        return queues
+
+    def run(self, *, workers=4, on_error=None, scan_kwargs=None):
+        """Scans on the calling thread until the scan ends, through its timeout or
+        `BLERadio.stop_scan`, and waits for the handlers to finish.
+
+        :param int workers: the number of threads that run handlers
+        :param on_error: function called with the handler, the advertisement and the
+            exception when a handler raises. By default the traceback is printed. An exception
+            raised by ``on_error``, or a handler exception that isn't an `Exception`, is raised
+            from `run` once the workers have stopped.
+        :param dict scan_kwargs: keyword arguments for `BLERadio.start_scan`
+        :return: the number of advertisements dropped for each handler, keyed by
+            (advertisement type, handler)
+        :rtype: dict
+        """
+        if not self._queues:
+            raise RuntimeError("No advertisement handlers")
+        scan_kwargs = scan_kwargs or {}
+        if (
+            scan_kwargs.get("batch_size", None) is not None
+            or scan_kwargs.get("batch_interval", None) is not None
+        ):
+            raise ValueError("Batched scans can't be dispatched")
+        if on_error is None:
+            on_error = _print_error
+        advertisement_types = []
+        for queue in self._queues:
+            if queue.advertisement_type not in advertisement_types:
+                advertisement_types.append(queue.advertisement_type)
+        for queue in self._queues:
+            queue.dropped = 0
+
+        pending = set()
+        failed = []
+        lock = threading.Lock()
+
+        def done(future):
+            with lock:
+                pending.discard(future)
+            if future.exception() is not None:
+                failed.append(future)
+
+        def submit(queue):
+            future = executor.submit(drain, queue)
+            with lock:
+                pending.add(future)
+            future.add_done_callback(done)
+
+        def drain(queue):
+            if queue.drain(on_error):
+                submit(queue)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for advertisement in self._radio.start_scan(
+                *advertisement_types, **scan_kwargs
+            ):
+                for queue in self._route(type(advertisement)):
+                    if queue.put(advertisement):
+                        submit(queue)
+            # A worker submits the next batch of its queue before its own future completes, so
+            # once every pending future is done, all queues are empty.
+            while not failed:
+                with lock:
+                    waiting = [future for future in pending if not future.done()]
+                if not waiting:
+                    break
+                wait(waiting)
+        if failed:
+            failed[0].result()
+        return {
+            (queue.advertisement_type, queue.handler): queue.dropped
+            for queue in self._queues
+        }
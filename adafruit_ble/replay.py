@@ -0,0 +1,178 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+:py:mod:`~adafruit_ble.replay`
+====================================================
+
+This module replays scan entries recorded with `adafruit_ble.capture` through a stand-in for the
+`_bleio.Adapter` scanning API. Passing a `ReplayAdapter` to `BLERadio` lets scanning code run
+against real-world captures, including on hosts without a BLE radio:
+
+.. code-block:: python
+
+    from adafruit_ble import BLERadio
+    from adafruit_ble.capture import ScanCapture
+    from adafruit_ble.replay import ReplayAdapter
+
+    with ScanCapture("scan.blecap") as capture:
+        ble = BLERadio(ReplayAdapter(capture, speed=None))
+        for advertisement in ble.start_scan():
+            print(advertisement)
+
+Only scanning is supported. Advertising and connecting raise `NotImplementedError`.
+
+"""
+
+import time
+
+import _bleio
+
+from .advertising import matches_prefix_bytes
+
+__version__ = "0.0.0-auto.0"
+__repo__ = "https://github.com/adafruit/Adafruit_CircuitPython_BLE.git"
+
+# Longest advertisement that can be received without extended scanning.
+_MAX_LEGACY_DATA_SIZE = 31
+
+
+class ReplayScanEntry:
+    """A recorded scan entry with the attributes and `matches` method of `_bleio.ScanEntry`."""
+
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = (
+        "address",
+        "advertisement_bytes",
+        "rssi",
+        "connectable",
+        "scan_response",
+        "timestamp",
+    )
+
+    def __init__(self, entry):
+        self.address = _bleio.Address(bytes(entry.address_bytes), entry.address_type)
+        self.advertisement_bytes = bytes(entry.advertisement_bytes)
+        self.rssi = entry.rssi
+        self.connectable = entry.connectable
+        self.scan_response = entry.scan_response
+        self.timestamp = entry.timestamp
+
+    def matches(self, prefixes, *, all=True):  # pylint: disable=redefined-builtin
+        """Returns ``True`` if the entry matches all the given prefixes, or any of them if
+        ``all`` is ``False``.
+
+        :param bytes prefixes: length prefixed byte strings, as made by
+            `Advertisement.get_prefix_bytes`
+        """
+        return matches_prefix_bytes(self.advertisement_bytes, prefixes, match_all=all)
+
+
+class ReplayAdapter:
+    """Implements the scanning subset of `_bleio.Adapter` used by `BLERadio` by replaying
+    recorded entries.
+
+    :param entries: a `ScanCapture` or any re-iterable of entries with the attributes of
+        `CapturedEntry`, in timestamp order
+    :param float speed: replay speed relative to the recorded timing. ``1.0`` replays at the
+        original timing and ``2.0`` twice as fast. ``None`` replays as fast as possible.
+    :param str name: the adapter name
+    """
+
+    def __init__(self, entries, *, speed=1.0, name="REPLAY"):
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive or None")
+        self._entries = entries
+        self._speed = speed
+        # Incremented by every start_scan() and stop_scan() call. A replay stops once it
+        # changes.
+        self._scan_id = 0
+        self.name = name
+        self.address = _bleio.Address(bytes(6), _bleio.Address.PUBLIC)
+        self.enabled = True
+
+    @property
+    def connected(self):
+        """Always ``False``; replayed scans have no connections."""
+        return False
+
+    @property
+    def connections(self):
+        """Always empty; replayed scans have no connections."""
+        return ()
+
+    @property
+    def advertising(self):
+        """Always ``False``; the replay adapter does not advertise."""
+        return False
+
+    def start_scan(
+        self,
+        prefixes=b"",
+        *,
+        buffer_size=512,
+        extended=False,
+        timeout=None,
+        interval=0.1,
+        window=0.1,
+        minimum_rssi=-80,
+        active=True
+    ):
+        """Replays the recorded entries with the filtering of `_bleio.Adapter.start_scan`.
+        Entries are produced if any of ``prefixes`` matches. Extended advertisements are
+        dropped unless ``extended`` is set and scan responses are dropped unless ``active`` is
+        set. ``timeout`` is measured in recorded time from the first entry. ``buffer_size``,
+        ``interval`` and ``window`` have no effect. Starting a scan ends any earlier one."""
+        # pylint: disable=unused-argument,too-many-arguments
+        self._scan_id += 1
+        return self._replay(
+            self._scan_id,
+            prefixes,
+            extended,
+            timeout,
+            minimum_rssi,
+            active,
+        )
+
+    def _replay(self, scan_id, prefixes, extended, timeout, minimum_rssi, active):
+        # pylint: disable=too-many-arguments
+        first_timestamp = None
+        start = time.monotonic()
+        for entry in self._entries:
+            if first_timestamp is None:
+                first_timestamp = entry.timestamp
+            elapsed = entry.timestamp - first_timestamp
+            if timeout is not None and elapsed > timeout:
+                return
+            if self._speed is not None:
+                delay = start + elapsed / self._speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            if scan_id != self._scan_id:
+                return
+            if entry.rssi < minimum_rssi or (entry.scan_response and not active):
+                continue
+            data = entry.advertisement_bytes
+            if len(data) > _MAX_LEGACY_DATA_SIZE and not extended:
+                continue
+            if not matches_prefix_bytes(data, prefixes, match_all=False):
+                continue
+            yield ReplayScanEntry(entry)
+
+    def stop_scan(self):
+        """Stops the replay. The scan iterator finishes before its next entry."""
+        self._scan_id += 1
+
+    def start_advertising(self, *args, **kwargs):
+        """Not supported."""
+        raise NotImplementedError("ReplayAdapter only supports scanning")
+
+    def stop_advertising(self):
+        """Not supported."""
+        raise NotImplementedError("ReplayAdapter only supports scanning")
+
+    def connect(self, *args, **kwargs):
+        """Not supported."""
+        raise NotImplementedError("ReplayAdapter only supports scanning")
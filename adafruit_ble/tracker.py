@@ -0,0 +1,274 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+:py:mod:`~adafruit_ble.tracker`
+====================================================
+
+This module keeps a table of the devices heard while scanning: their smoothed signal strength,
+when they were last heard, how many packets were heard and their latest advertisement of each
+type. Devices that haven't been heard for a while expire on their own.
+
+.. code-block:: python
+
+    from adafruit_ble import BLERadio
+    from adafruit_ble.tracker import DeviceTracker
+
+    ble = BLERadio()
+    tracker = DeviceTracker(ttl=5)
+    for advertisement in tracker.track(ble.start_scan(timeout=1)):
+        pass
+    for device in tracker.strongest(3):
+        print(device.address, device.rssi)
+
+Requires the `heapq` module.
+
+"""
+
+import heapq
+import time
+
+__version__ = "0.0.0-auto.0"
+__repo__ = "https://github.com/adafruit/Adafruit_CircuitPython_BLE.git"
+
+
+class DeviceRecord:
+    """What is known about one tracked device. Read only; updated by `DeviceTracker`."""
+
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = (
+        "address",
+        "rssi",
+        "last_rssi",
+        "first_seen",
+        "last_seen",
+        "count",
+        "advertisements",
+        "_version",
+        "_tick",
+    )
+
+    def __init__(self, address, now):
+        self.address = address
+        self.rssi = None
+        """Exponentially weighted moving average of the signal strength."""
+        self.last_rssi = None
+        """Signal strength of the latest packet."""
+        self.first_seen = now
+        self.last_seen = now
+        self.count = 0
+        """Number of packets heard."""
+        self.advertisements = {}
+        """Latest advertisement of each `Advertisement` type, keyed by type."""
+        # Matches the newest heap entry for this record.
+        self._version = 0
+        # Timing wheel tick this record is scheduled in, or None.
+        self._tick = None
+
+    def __repr__(self):
+        return "<DeviceRecord {} rssi={:.1f} count={}>".format(
+            self.address, self.rssi, self.count
+        )
+
+
+class DeviceTracker:
+    """Tracks devices from scanned advertisements.
+
+    Records expire through a timing wheel: each record is checked at most a few times, however
+    many records there are. Strongest devices are found with a max heap of smoothed signal
+    strengths that is updated lazily.
+
+    :param float ttl: time (in seconds) after which a device that hasn't been heard expires
+    :param float alpha: weight of the newest signal strength in the moving average, from 0 to 1
+    :param float resolution: granularity (in seconds) of expiry
+    :param int max_devices: the maximum number of devices tracked. When full, the device heard
+        least recently is dropped to make room. ``None`` for no limit.
+    :param on_expire: function called with each `DeviceRecord` that expires or is dropped
+    :param clock: function returning the current time in seconds
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        *,
+        ttl=10.0,
+        alpha=0.3,
+        resolution=0.5,
+        max_devices=None,
+        on_expire=None,
+        clock=time.monotonic
+    ):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be greater than 0 and at most 1")
+        if ttl <= 0 or resolution <= 0:
+            raise ValueError("ttl and resolution must be positive")
+        self._ttl = ttl
+        self._alpha = alpha
+        self._resolution = resolution
+        self._max_devices = max_devices
+        self._on_expire = on_expire
+        self._clock = clock
+        self._records = {}
+        # Entries of (-rssi, version, address). Entries whose version doesn't match their
+        # record are stale and skipped.
+        self._heap = []
+        self._version = 0
+        # Enough slots that every expiry time is less than one rotation ahead.
+        self._slots = int(ttl / resolution) + 3
+        # Each slot holds (address, tick) entries scheduled for a tick.
+        self._wheel = [[] for _ in range(self._slots)]
+        self._tick = None
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, address):
+        return address in self._records
+
+    def __getitem__(self, address):
+        return self._records[address]
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def update(self, advertisement, *, now=None):
+        """Updates the record of the device that sent ``advertisement`` and returns it.
+
+        :param Advertisement advertisement: a scanned advertisement
+        :param float now: time the advertisement was heard. Defaults to the tracker's clock.
+        :rtype: DeviceRecord
+        """
+        if now is None:
+            now = self._clock()
+        self._advance(now)
+        address = advertisement.address
+        record = self._records.get(address, None)
+        if record is None:
+            if (
+                self._max_devices is not None
+                and len(self._records) >= self._max_devices
+            ):
+                self._drop_soonest()
+            record = DeviceRecord(address, now)
+            self._records[address] = record
+        rssi = advertisement.rssi
+        record.last_rssi = rssi
+        smoothed = rssi
+        if record.rssi is not None:
+            smoothed = record.rssi + self._alpha * (rssi - record.rssi)
+        record.rssi = smoothed
+        record.last_seen = now
+        record.count += 1
+        record.advertisements[type(advertisement)] = advertisement
+        self._version += 1
+        record._version = self._version  # pylint: disable=protected-access
+        heapq.heappush(self._heap, (-smoothed, self._version, address))
+        if len(self._heap) > 4 * len(self._records) + 64:
+            self._rebuild_heap()
+        if record._tick is None:  # pylint: disable=protected-access
+            self._schedule(record)
+        return record
+
+    def track(self, scan):
+        """Updates the tracker with every advertisement of ``scan``, such as the iterator
+        returned by `BLERadio.start_scan`, and yields it on unchanged."""
+        for advertisement in scan:
+            self.update(advertisement)
+            yield advertisement
+
+    def expire(self, now=None):
+        """Expires the devices that haven't been heard for ``ttl`` seconds. This is also done
+        by `update` and `strongest`."""
+        if now is None:
+            now = self._clock()
+        self._advance(now)
+
+    def strongest(self, count=1, *, now=None):
+        """Returns up to ``count`` `DeviceRecord` objects with the strongest smoothed signal,
+        strongest first."""
+        self.expire(now)
+        heap = self._heap
+        found = []
+        entries = []
+        while heap and len(found) < count:
+            entry = heapq.heappop(heap)
+            record = self._records.get(entry[2], None)
+            # pylint: disable=protected-access
+            if record is not None and record._version == entry[1]:
+                found.append(record)
+                entries.append(entry)
+        for entry in entries:
+            heapq.heappush(heap, entry)
+        return found
+
+    def _rebuild_heap(self):
+        # pylint: disable=protected-access
+        self._heap = [
+            (-record.rssi, record._version, address)
+            for address, record in self._records.items()
+        ]
+        heapq.heapify(self._heap)
+
+    def _schedule(self, record):
+        # pylint: disable=protected-access
+        tick = int((record.last_seen + self._ttl) / self._resolution) + 1
+        record._tick = tick
+        self._wheel[tick % self._slots].append((record.address, tick))
+
+    def _remove(self, record):
+        del self._records[record.address]
+        record._tick = None  # pylint: disable=protected-access
+        if self._on_expire is not None:
+            self._on_expire(record)
+
+    def _advance(self, now):
+        """Moves the timing wheel up to ``now``, expiring or rescheduling the records in the
+        slots passed over."""
+        target = int(now / self._resolution)
+        if self._tick is None:
+            self._tick = target
+            return
+        steps = min(target - self._tick, self._slots)
+        for step in range(1, steps + 1):
+            index = (self._tick + step) % self._slots
+            bucket = self._wheel[index]
+            self._wheel[index] = []
+            for address, tick in bucket:
+                if tick > target:
+                    self._wheel[index].append((address, tick))
+                    continue
+                record = self._records.get(address, None)
+                # pylint: disable=protected-access
+                if record is None or record._tick != tick:
+                    continue
+                if record.last_seen + self._ttl <= now:
+                    self._remove(record)
+                else:
+                    # Heard since it was scheduled.
+                    self._schedule(record)
+        if target > self._tick:
+            self._tick = target
+
+    def _drop_soonest(self):
+        """Drops the record that expires first, that is the one heard least recently. Records
+        heard since they were scheduled are moved to their current slot on the way."""
+        # Records moved on the way may need a second rotation to be found again.
+        for step in range(1, 2 * self._slots + 1):
+            index = (self._tick + step) % self._slots
+            bucket = sorted(self._wheel[index], key=lambda entry: entry[1])
+            self._wheel[index] = []
+            for address, tick in bucket:
+                record = self._records.get(address, None)
+                # pylint: disable=protected-access
+                if record is None or record._tick != tick:
+                    continue
+                if int((record.last_seen + self._ttl) / self._resolution) + 1 == tick:
+                    self._remove(record)
+                    self._wheel[index].extend(
+                        entry for entry in bucket if entry[1] >= tick
+                    )
+                    return
+                self._schedule(record)
@@ -65,8 +65,7 @@ while True:
                 neopixels.fill(color)
                 print("New color {:06x}".format(color))
                 advertisement.color = color
-                ble.stop_advertising()
-                ble.start_advertising(advertisement)
+                ble.update_advertisement(advertisement)
                 time.sleep(0.5)
         ble.stop_advertising()
     # The second mode listens for color broadcasts and shows the color of the strongest signal.
@@ -1,9 +1,9 @@
 # SPDX-FileCopyrightText: 2020 ladyada for Adafruit Industries
 # SPDX-License-Identifier: MIT
 
-# This example scans for any BLE advertisements and prints one advertisement and one scan response
-# from every device found. This scan is more detailed than the simple test because it includes
-# specialty advertising types.
+# This example scans for any BLE advertisements and prints one advertisement, merged with its scan
+# response, from every device found. This scan is more detailed than the simple test because it
+# includes specialty advertising types.
 
 from adafruit_ble import BLERadio
 
@@ -13,16 +13,14 @@ from adafruit_ble.advertising.standard import ProvideServicesAdvertisement
 ble = BLERadio()
 print("scanning")
 found = set()
-scan_responses = set()
 # By providing Advertisement as well we include everything, not just specific advertisements.
-for advertisement in ble.start_scan(ProvideServicesAdvertisement, Advertisement):
+for advertisement in ble.start_scan(
+    ProvideServicesAdvertisement, Advertisement, merge_scan_responses=True
+):
     addr = advertisement.address
-    if advertisement.scan_response and addr not in scan_responses:
-        scan_responses.add(addr)
-    elif not advertisement.scan_response and addr not in found:
-        found.add(addr)
-    else:
+    if addr in found:
         continue
+    found.add(addr)
     print(addr, advertisement)
     print("\t" + repr(advertisement))
     print()